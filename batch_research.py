@@ -0,0 +1,284 @@
+"""Research many topics in one process and stream the results to JSONL.
+
+Topics come from a JSONL file (one ``{"topic": ..., "id": ...}`` object or
+bare string per line) or a CSV file (a ``topic`` column, otherwise the first
+column, plus an optional ``id`` column). Every run in the process shares the
+pooled HTTP sessions, the search/scrape/summary caches, the per-stage
+concurrency limits and the LLM rate limiter, so ``--parallel`` only decides
+how many topics are in flight at once.
+
+Each finished topic is appended to the output file as soon as it completes.
+Re-running the same command skips topics already recorded as completed, so
+an interrupted batch resumes where it stopped.
+
+    python batch_research.py topics.csv -o results.jsonl --parallel 8
+    LLM_REQUESTS_PER_MINUTE=300 python batch_research.py topics.jsonl -o out.jsonl
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from pydantic import BaseModel
+
+from main import DEFAULT_MAX_ARTICLES, ResearchOutput, run_research_pipeline
+from tools.search_tool import normalize_query
+from tools.telemetry import maybe_start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARALLEL = int(os.getenv("BATCH_PARALLEL", "4"))
+
+
+class BatchTopic(BaseModel):
+    id: str
+    topic: str
+    max_articles: Optional[int] = None
+
+
+class BatchSummary(BaseModel):
+    total: int
+    skipped: int
+    completed: int
+    failed: int
+    duration_seconds: float
+
+
+def _topic(id: Optional[str], topic: str, max_articles=None) -> Optional[BatchTopic]:
+    topic = (topic or "").strip()
+    if not topic:
+        return None
+    return BatchTopic(
+        id=str(id).strip() if id not in (None, "") else normalize_query(topic),
+        topic=topic,
+        max_articles=int(max_articles) if max_articles not in (None, "") else None,
+    )
+
+
+def read_topics(path: str) -> List[BatchTopic]:
+    """Load topics from a .jsonl/.json-lines or .csv file, dropping repeated ids"""
+    topics: List[BatchTopic] = []
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            reader = csv.reader(f)
+            header = next(reader, None) or []
+            columns = [name.strip().lower() for name in header]
+            if "topic" not in columns and "query" in columns:
+                columns[columns.index("query")] = "topic"
+            if "topic" in columns:
+                rows: Iterable[Dict] = csv.DictReader(f, fieldnames=columns)
+            else:
+                # No header row: the first line is already a topic.
+                rows = ({"topic": row[0]} for row in [header, *reader] if row)
+            for row in rows:
+                topics.append(_topic(row.get("id"), row.get("topic", ""), row.get("max_articles")))
+        else:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = line
+                if isinstance(record, str):
+                    topics.append(_topic(None, record))
+                elif isinstance(record, dict):
+                    topics.append(_topic(
+                        record.get("id"),
+                        record.get("topic") or record.get("query", ""),
+                        record.get("max_articles"),
+                    ))
+                else:
+                    raise ValueError(f"{path}:{number}: expected a string or an object")
+
+    seen: Set[str] = set()
+    unique = []
+    for topic in topics:
+        if topic is not None and topic.id not in seen:
+            seen.add(topic.id)
+            unique.append(topic)
+    return unique
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids already recorded with a completed status in an earlier (maybe interrupted) run"""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by the interruption; that topic runs again.
+                continue
+            if str(record.get("status", "")).startswith("Completed"):
+                done.add(record["id"])
+    return done
+
+
+class ResultWriter:
+    """Appends one JSON line per finished topic and flushes it to disk at once"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        truncated = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                truncated = f.read(1) != b"\n"
+        self._file = open(path, "a", encoding="utf-8")
+        # Don't glue the next record onto a line cut short by a crash.
+        if truncated:
+            self._file.write("\n")
+
+    def write(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+async def research_topic(
+    topic: BatchTopic,
+    max_articles: int = DEFAULT_MAX_ARTICLES,
+    summary_mode: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+) -> Dict:
+    """Run one topic through run_research_pipeline and return its output record"""
+    final: Optional[ResearchOutput] = None
+    try:
+        async for output in run_research_pipeline(
+            topic.topic,
+            summary_mode=summary_mode,
+            max_articles=topic.max_articles or max_articles,
+            deadline_seconds=deadline_seconds,
+        ):
+            final = output
+    except Exception as e:
+        logger.warning("❌ %s failed: %s", topic.id, e)
+        return {"id": topic.id, "query": topic.topic, "status": f"Error: {type(e).__name__}: {e}"}
+    if final is None:
+        return {"id": topic.id, "query": topic.topic, "status": "Error: no output"}
+    # Full article texts, not the in-memory previews, so the output stands alone.
+    record = final.model_dump(exclude={"articles"})
+    record["articles"] = [article.export_record() for article in final.articles]
+    return {"id": topic.id, **record}
+
+
+async def run_batch(
+    topics: List[BatchTopic],
+    output_path: str,
+    parallel: int = DEFAULT_PARALLEL,
+    max_articles: int = DEFAULT_MAX_ARTICLES,
+    summary_mode: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+    resume: bool = True,
+) -> BatchSummary:
+    """Research ``topics`` with ``parallel`` runs in flight, appending results as they finish.
+
+    With ``resume`` (the default) topics already completed in ``output_path``
+    are skipped; failed or unfinished ones run again.
+    """
+    start = time.perf_counter()
+    done = completed_ids(output_path) if resume else set()
+    pending = [topic for topic in topics if topic.id not in done]
+    if not resume and os.path.exists(output_path):
+        os.remove(output_path)
+    logger.info(
+        "📚 %d topics, %d already done, %d to run with %d in parallel",
+        len(topics), len(topics) - len(pending), len(pending), parallel
+    )
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for topic in pending:
+        queue.put_nowait(topic)
+    writer = ResultWriter(output_path)
+    counts = {"completed": 0, "failed": 0}
+
+    async def worker() -> None:
+        while True:
+            try:
+                topic = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            record = await research_topic(topic, max_articles, summary_mode, deadline_seconds)
+            record["finished_at"] = datetime.now(timezone.utc).isoformat()
+            writer.write(record)
+            key = "completed" if str(record.get("status", "")).startswith("Completed") else "failed"
+            counts[key] += 1
+            logger.info(
+                "✅ [%d/%d] %s: %s",
+                counts["completed"] + counts["failed"], len(pending), topic.id, record.get("status")
+            )
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(parallel, len(pending))))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        writer.close()
+        from tools.search_tool import default_client
+        from tools.scrapper_tool import page_session
+        from tools.extraction import extraction_pool
+
+        await default_client.close()
+        await page_session.close()
+        extraction_pool.shutdown()
+
+    return BatchSummary(
+        total=len(topics),
+        skipped=len(topics) - len(pending),
+        completed=counts["completed"],
+        failed=counts["failed"],
+        duration_seconds=time.perf_counter() - start,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("topics", help="topics file (.jsonl or .csv)")
+    parser.add_argument("-o", "--output", required=True, help="results JSONL, appended to")
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL, help="topics in flight at once")
+    parser.add_argument("--max-articles", type=int, default=DEFAULT_MAX_ARTICLES)
+    parser.add_argument("--mode", choices=["direct", "batch", "agent"], default=None, help="summarizer mode")
+    parser.add_argument("--deadline", type=float, default=None, help="per-topic deadline in seconds")
+    parser.add_argument("--no-resume", action="store_true", help="start over instead of skipping done topics")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    maybe_start_metrics_server()
+    topics = read_topics(args.topics)
+    try:
+        summary = asyncio.run(run_batch(
+            topics,
+            args.output,
+            parallel=args.parallel,
+            max_articles=args.max_articles,
+            summary_mode=args.mode,
+            deadline_seconds=args.deadline,
+            resume=not args.no_resume,
+        ))
+    except KeyboardInterrupt:
+        print(f"\n⏸️ Interrupted; finished topics are in {args.output}. Re-run the same command to resume.")
+        return 130
+    print(
+        f"📊 {summary.completed} completed, {summary.failed} failed, {summary.skipped} skipped "
+        f"in {summary.duration_seconds:.1f}s → {args.output}"
+    )
+    return 0 if summary.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""Local stand-ins for every network dependency of the research pipeline.
+
+One aiohttp app serves:
+
+* ``/articles/{n}``          a synthetic (or recorded) HTML corpus
+* ``/customsearch/v1``       a Google Custom Search lookalike over that corpus
+* ``/v1/chat/completions``   an OpenAI-compatible model server (plain or streamed) that answers
+                             the query, summarizer and batch-summarizer schemas
+* ``/_stats``                request counters, for the benchmark report
+
+Latency and failures are injected deterministically: whether a request fails
+depends only on the seed, the request identity and how many times that exact
+request has been seen, so two runs with the same flags see the same faults.
+
+    python benchmarks/fake_services.py --port 8900 --llm-latency 0.3 --llm-error-rate 0.05
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+WORDS = (
+    "market energy policy research climate battery solar grid model data network "
+    "growth report analysis region supply demand capacity storage hydrogen cost "
+    "investment technology study results emissions efficiency transport industry "
+    "sector forecast government agency public private budget infrastructure "
+    "production consumption price trend survey evidence impact strategy project"
+).split()
+
+
+# Streamed replies are cut into chunks of about this many characters (a couple of tokens).
+STREAM_CHUNK_CHARS = 8
+
+
+def _fraction(*parts) -> float:
+    """Stable pseudo-random number in [0, 1) derived from ``parts``"""
+    return zlib.crc32(json.dumps(parts).encode("utf-8")) / 2**32
+
+
+class Corpus:
+    """Deterministic set of HTML pages addressed by index.
+
+    Synthetic pages vary in length; ``long_fraction`` of them are long enough
+    to go through map-reduce summarization and ``duplicate_fraction`` repeat
+    another page's body under a different URL.
+    """
+
+    def __init__(
+        self,
+        size: int = 60,
+        seed: int = 0,
+        long_fraction: float = 0.05,
+        duplicate_fraction: float = 0.1,
+        directory: Optional[str] = None,
+    ):
+        self.pages: List[Dict[str, str]] = []
+        if directory:
+            for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    html = f.read()
+                match = re.search(r"<title>(.*?)</title>", html, re.I | re.S)
+                title = match.group(1).strip() if match else os.path.basename(path)
+                self.pages.append({"title": title, "html": html, "snippet": title})
+            if not self.pages:
+                raise ValueError(f"No .html files in {directory}")
+            return
+
+        rng = random.Random(seed)
+        for n in range(size):
+            if n and rng.random() < duplicate_fraction:
+                original = self.pages[rng.randrange(n)]
+                self.pages.append(dict(original))
+                continue
+            paragraphs = 120 if rng.random() < long_fraction else rng.randint(4, 14)
+            title = " ".join(rng.choice(WORDS) for _ in range(6)).capitalize()
+            body = "\n".join(
+                "<p>" + " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 90))) + ".</p>"
+                for _ in range(paragraphs)
+            )
+            html = (
+                f"<html><head><title>{title}</title></head><body>"
+                f"<nav><a href='/'>Home</a></nav><article><h1>{title}</h1>{body}</article>"
+                f"<footer><p>Copyright</p></footer></body></html>"
+            )
+            self.pages.append({"title": title, "html": html, "snippet": title.lower()})
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+
+class FakeServices:
+    """The aiohttp application plus its fault-injection settings and counters"""
+
+    def __init__(
+        self,
+        corpus: Corpus,
+        seed: int = 0,
+        results_per_query: int = 5,
+        page_latency: float = 0.02,
+        page_error_rate: float = 0.0,
+        search_latency: float = 0.05,
+        llm_latency: float = 0.3,
+        llm_jitter: float = 0.1,
+        llm_error_rate: float = 0.0,
+        llm_first_token: float = 0.1,
+    ):
+        self.corpus = corpus
+        self.seed = seed
+        self.results_per_query = results_per_query
+        self.page_latency = page_latency
+        self.page_error_rate = page_error_rate
+        self.search_latency = search_latency
+        self.llm_latency = llm_latency
+        self.llm_jitter = llm_jitter
+        self.llm_error_rate = llm_error_rate
+        self.llm_first_token = llm_first_token
+        self.counters: Counter = Counter()
+        self._attempts: Counter = Counter()
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024**2)
+        app.router.add_get("/articles/{n}", self.article)
+        app.router.add_get("/customsearch/v1", self.search)
+        app.router.add_post("/v1/chat/completions", self.chat)
+        app.router.add_get("/_stats", self.stats)
+        app.router.add_post("/_reset", self.reset)
+        return app
+
+    def _should_fail(self, kind: str, identity: str, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        attempt = self._attempts[(kind, identity)]
+        self._attempts[(kind, identity)] += 1
+        return _fraction(self.seed, kind, identity, attempt) < rate
+
+    async def article(self, request: web.Request) -> web.Response:
+        self.counters["page_requests"] += 1
+        try:
+            page = self.corpus.pages[int(request.match_info["n"])]
+        except (ValueError, IndexError):
+            self.counters["page_errors"] += 1
+            return web.Response(status=404)
+        await asyncio.sleep(self.page_latency)
+        if self._should_fail("page", request.path, self.page_error_rate):
+            self.counters["page_errors"] += 1
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        etag = '"%s"' % hashlib.sha1(page["html"].encode("utf-8")).hexdigest()[:16]
+        if request.headers.get("If-None-Match") == etag:
+            self.counters["page_not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        body = page["html"].encode("utf-8")
+        self.counters["page_bytes"] += len(body)
+        return web.Response(body=body, content_type="text/html", charset="utf-8", headers={"ETag": etag})
+
+    async def search(self, request: web.Request) -> web.Response:
+        self.counters["search_requests"] += 1
+        query = request.query.get("q", "")
+        await asyncio.sleep(self.search_latency)
+        num = min(int(request.query.get("num", self.results_per_query)), len(self.corpus))
+        rng = random.Random(zlib.crc32(f"{self.seed}:{query}".encode("utf-8")))
+        base = f"{request.scheme}://{request.host}"
+        items = []
+        for n in rng.sample(range(len(self.corpus)), num):
+            page = self.corpus.pages[n]
+            items.append({
+                "title": page["title"],
+                "link": f"{base}/articles/{n}?utm_source=bench",
+                "snippet": page["snippet"],
+            })
+        return web.json_response({"items": items})
+
+    async def chat(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        messages = body.get("messages", [])
+        prompt = str(messages[-1].get("content", "")) if messages else ""
+        schema = (
+            (body.get("response_format") or {}).get("json_schema", {}).get("schema", {})
+        )
+        properties = schema.get("properties", {})
+        if "queries" in properties:
+            kind = "query"
+        elif "summaries" in properties:
+            kind = "batch_summary"
+        else:
+            kind = "summary"
+        self.counters[f"llm_{kind}_calls"] += 1
+        self.counters["llm_calls"] += 1
+
+        identity = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        rng = random.Random(zlib.crc32(f"{self.seed}:{identity}".encode("utf-8")))
+        latency = max(0.0, self.llm_latency + rng.uniform(-self.llm_jitter, self.llm_jitter))
+        streamed = bool(body.get("stream"))
+        # A streamed reply starts after a fraction of the latency; the rest is
+        # spread over its chunks.
+        await asyncio.sleep(latency * self.llm_first_token if streamed else latency)
+        if self._should_fail("llm", identity, self.llm_error_rate):
+            self.counters["llm_errors"] += 1
+            return web.json_response(
+                {"error": {"message": "injected failure", "type": "server_error"}}, status=503
+            )
+
+        def sentence() -> str:
+            return " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 24))).capitalize() + "."
+
+        if kind == "query":
+            topic = prompt.strip().splitlines()[-1] if prompt.strip() else "topic"
+            content = {
+                "queries": [f"{topic} {rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(3)],
+                "thought": sentence(),
+            }
+        elif kind == "batch_summary":
+            urls = re.findall(r"^URL: (.*)$", prompt, re.M)
+            content = {"summaries": [{"url": url, "summary": sentence()} for url in urls]}
+        else:
+            content = {"summary": " ".join(sentence() for _ in range(3))}
+
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        completion = json.dumps(content)
+        completion_tokens = len(completion) // 4
+        self.counters["llm_prompt_tokens"] += prompt_tokens
+        self.counters["llm_completion_tokens"] += completion_tokens
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if streamed:
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            return await self._stream_chat(
+                request, body, identity, completion, usage if include_usage else None,
+                latency * (1 - self.llm_first_token)
+            )
+        return web.json_response({
+            "id": f"chatcmpl-{identity[:12]}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": completion},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    async def _stream_chat(
+        self,
+        request: web.Request,
+        body: Dict,
+        identity: str,
+        completion: str,
+        usage: Optional[Dict],
+        duration: float,
+    ) -> web.StreamResponse:
+        """Send ``completion`` as chat.completion.chunk SSE messages over ``duration`` seconds"""
+        self.counters["llm_streamed_calls"] += 1
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        def chunk(delta: Dict, finish_reason: Optional[str] = None, **extra) -> bytes:
+            message = {
+                "id": f"chatcmpl-{identity[:12]}",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+                **extra,
+            }
+            return f"data: {json.dumps(message)}\n\n".encode("utf-8")
+
+        pieces = [completion[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(completion), STREAM_CHUNK_CHARS)]
+        await response.write(chunk({"role": "assistant", "content": ""}))
+        for piece in pieces:
+            await response.write(chunk({"content": piece}))
+            await asyncio.sleep(duration / len(pieces))
+        await response.write(chunk({}, "stop"))
+        if usage is not None:
+            await response.write(chunk(None, usage=usage))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.counters))
+
+    async def reset(self, request: web.Request) -> web.Response:
+        self.counters.clear()
+        self._attempts.clear()
+        return web.json_response({})
+
+
+# (flag, type, default, help) for every fault-injection / corpus setting.
+OPTIONS = [
+    ("--seed", int, 0, None),
+    ("--corpus-size", int, 60, None),
+    ("--corpus-dir", str, None, "serve recorded *.html files instead of synthetic pages"),
+    ("--long-fraction", float, 0.05, None),
+    ("--duplicate-fraction", float, 0.1, None),
+    ("--results-per-query", int, 5, None),
+    ("--page-latency", float, 0.02, None),
+    ("--page-error-rate", float, 0.0, None),
+    ("--search-latency", float, 0.05, None),
+    ("--llm-latency", float, 0.3, None),
+    ("--llm-jitter", float, 0.1, None),
+    ("--llm-error-rate", float, 0.0, None),
+    ("--llm-first-token", float, 0.1, "share of the LLM latency before a streamed reply starts"),
+]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Fake-service flags, shared with the pipeline benchmark"""
+    group = parser.add_argument_group("fake services")
+    for flag, kind, default, help in OPTIONS:
+        group.add_argument(flag, type=kind, default=default, help=help)
+
+
+def to_argv(args: argparse.Namespace) -> List[str]:
+    """Turn parsed fake-service flags back into a command line"""
+    argv = []
+    for flag, _, _, _ in OPTIONS:
+        value = getattr(args, flag[2:].replace("-", "_"))
+        if value is not None:
+            argv += [flag, str(value)]
+    return argv
+
+
+def from_arguments(args: argparse.Namespace) -> FakeServices:
+    corpus = Corpus(
+        size=args.corpus_size,
+        seed=args.seed,
+        long_fraction=args.long_fraction,
+        duplicate_fraction=args.duplicate_fraction,
+        directory=args.corpus_dir,
+    )
+    return FakeServices(
+        corpus,
+        seed=args.seed,
+        results_per_query=args.results_per_query,
+        page_latency=args.page_latency,
+        page_error_rate=args.page_error_rate,
+        search_latency=args.search_latency,
+        llm_latency=args.llm_latency,
+        llm_jitter=args.llm_jitter,
+        llm_error_rate=args.llm_error_rate,
+        llm_first_token=args.llm_first_token,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+    web.run_app(from_arguments(args).app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
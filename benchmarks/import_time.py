@@ -0,0 +1,103 @@
+"""Cold-import benchmark and regression guard.
+
+Imports each entry module in a fresh interpreter several times, reports the
+median wall time, and fails if it goes over budget or if any heavy dependency
+(agents SDK, openai, newspaper3k, bs4, pandas, ...) gets imported eagerly.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget 0.5 --runs 10 main
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["main", "custom_agents", "tools"]
+
+# Modules that must only be loaded on first use, never at import time.
+LAZY_MODULES = [
+    "agents",
+    "openai",
+    "google.generativeai",
+    "newspaper",
+    "bs4",
+    "requests",
+    "pandas",
+    "aiohttp",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, runs: int) -> dict:
+    env = dict(os.environ)
+    # Importing must not need credentials; clients are built lazily.
+    env.pop("GEMINI_API_KEY", None)
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    samples = []
+    loaded = set()
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, lazy=LAZY_MODULES)],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"importing {module} failed:\n{proc.stderr}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        loaded.update(result["loaded"])
+    return {
+        "module": module,
+        "median_seconds": statistics.median(samples),
+        "min_seconds": min(samples),
+        "max_seconds": max(samples),
+        "eagerly_loaded": sorted(loaded),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=float(os.getenv("IMPORT_BUDGET_SECONDS", "1.0")),
+        help="maximum median import time per module, in seconds",
+    )
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = [measure(module, args.runs) for module in args.modules]
+    failed = False
+    for result in results:
+        over_budget = result["median_seconds"] > args.budget
+        failed = failed or over_budget or bool(result["eagerly_loaded"])
+        if not args.json:
+            mark = "❌" if over_budget or result["eagerly_loaded"] else "✅"
+            print(
+                f"{mark} {result['module']}: median {result['median_seconds'] * 1000:.0f} ms "
+                f"(min {result['min_seconds'] * 1000:.0f}, max {result['max_seconds'] * 1000:.0f})"
+            )
+            if result["eagerly_loaded"]:
+                print(f"   eagerly imported: {', '.join(result['eagerly_loaded'])}")
+    if args.json:
+        print(json.dumps({"budget_seconds": args.budget, "results": results}, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
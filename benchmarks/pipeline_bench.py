@@ -0,0 +1,355 @@
+"""Offline end-to-end benchmark for the research pipeline.
+
+Starts benchmarks/fake_services.py in a separate process (HTML corpus, fake
+Custom Search and a fake OpenAI-compatible model server), points the
+pipeline at it through environment variables, runs a batch of topics and
+reports throughput, per-stage latency percentiles, peak memory and LLM call
+counts. Nothing touches the network, caches start cold in a temporary
+directory, and fault injection is seeded, so results from different commits
+are comparable.
+
+    python benchmarks/pipeline_bench.py --topics 20 --parallel 4 --output bench.json
+    python benchmarks/pipeline_bench.py --mode batch --llm-latency 1.0 --llm-error-rate 0.05
+    python benchmarks/pipeline_bench.py --compare before.json after.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_services import add_arguments, to_argv  # noqa: E402
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Headline numbers shown by --compare, with whether bigger is better.
+COMPARED_METRICS = {
+    "throughput.topics_per_minute": True,
+    "throughput.articles_per_second": True,
+    "latency.total.p50": False,
+    "latency.total.p95": False,
+    "latency.first_article.p50": False,
+    "latency.first_content.p50": False,
+    "latency.query_generation.p50": False,
+    "latency.search.p50": False,
+    "latency.scrape.p50": False,
+    "latency.article.p95": False,
+    "memory.peak_rss_mb": False,
+    "llm.calls": False,
+    "llm.calls_per_article": False,
+}
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    result = {"count": len(ordered), "mean": round(statistics.fmean(ordered), 4)}
+    for p in PERCENTILES:
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        result[f"p{p}"] = round(ordered[index], 4)
+    result["max"] = round(ordered[-1], 4)
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_revision() -> Dict[str, Optional[str]]:
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def fetch_json(url: str, method: str = "GET") -> Dict:
+    request = urllib.request.Request(url, method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def start_services(port: int, fake_argv: List[str]) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "fake_services.py"), "--port", str(port), *fake_argv],
+        cwd=ROOT,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("fake services exited during startup")
+        try:
+            fetch_json(f"http://127.0.0.1:{port}/_stats")
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("fake services did not start within 30s")
+
+
+def configure_environment(args: argparse.Namespace, base_url: str, cache_dir: str) -> None:
+    """Point every client at the fake services; must run before importing main"""
+    os.environ.update({
+        "GEMINI_API_KEY": "benchmark",
+        "GEMINI_BASE_URL": f"{base_url}/v1",
+        "WEBSEARCH_API_KEY_2": "benchmark",
+        "CX_ID_2": "benchmark",
+        "CUSTOM_SEARCH_URL": f"{base_url}/customsearch/v1",
+        "RESEARCH_CACHE_DIR": cache_dir,
+        "SUMMARIZER_MODE": args.mode,
+        "EXTRACT_EXECUTOR": args.extract_executor,
+        "OPENAI_AGENTS_DISABLE_TRACING": "1",
+    })
+    enabled = "1" if args.caches else "0"
+    for name in ("SEARCH_CACHE_ENABLED", "SCRAPE_CACHE_ENABLED", "SUMMARY_CACHE_ENABLED", "RESULT_CACHE_ENABLED"):
+        os.environ[name] = enabled
+
+
+def topics_for(args: argparse.Namespace) -> List[str]:
+    if args.topics_file:
+        with open(args.topics_file, encoding="utf-8") as f:
+            topics = [line.strip() for line in f if line.strip()]
+        return topics[: args.topics] if args.topics else topics
+    return [f"benchmark topic {n}" for n in range(args.topics)]
+
+
+async def run_topic(main_module, topic: str, args: argparse.Namespace, quiet: bool) -> Dict:
+    """Run one topic and turn its event stream into stage timings"""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    timings: Dict[str, object] = {"topic": topic, "scrape": [], "article": []}
+    search_done_at = None
+    events = main_module.run_research_events(
+        topic,
+        max_articles=args.max_articles,
+        max_concurrency=args.max_concurrency,
+        summary_mode=args.mode,
+        deadline_seconds=args.deadline,
+        stream_summaries=args.stream_summaries,
+    )
+    async for event in events:
+        now = loop.time() - start
+        if event.type == "queries_generated":
+            timings["query_generation"] = now
+        elif event.type == "search_done":
+            timings["search"] = now - timings.get("query_generation", 0.0)
+            search_done_at = now
+        elif event.type == "article_scraped":
+            timings["scrape"].append(now - (search_done_at or 0.0))
+        elif event.type == "summary_delta":
+            timings.setdefault("first_content", now)
+        elif event.type in ("article_summarized", "article_failed"):
+            timings["article"].append(now - (search_done_at or 0.0))
+            timings.setdefault("first_article", now)
+            if event.type == "article_summarized":
+                timings.setdefault("first_content", now)
+        elif event.type == "completed":
+            timings.update(
+                total=now,
+                status=event.status,
+                successful=event.successful,
+                failed=event.failed,
+            )
+    if not quiet:
+        print(f"  {topic}: {timings.get('status')} in {timings.get('total', 0):.2f}s", file=sys.stderr)
+    return timings
+
+
+async def run_benchmark(main_module, topics: List[str], args: argparse.Namespace) -> List[Dict]:
+    gate = asyncio.Semaphore(args.parallel)
+
+    async def one(topic: str) -> Dict:
+        async with gate:
+            return await run_topic(main_module, topic, args, args.quiet)
+
+    try:
+        return await asyncio.gather(*(one(topic) for topic in topics))
+    finally:
+        from tools.search_tool import default_client
+        from tools.scrapper_tool import page_session
+
+        await default_client.close()
+        await page_session.close()
+        main_module.extraction_pool.shutdown()
+
+
+def summarize_runs(runs: List[Dict], wall: float, server: Dict) -> Dict:
+    stages = defaultdict(list)
+    for run in runs:
+        for stage in ("query_generation", "search", "first_article", "first_content", "total"):
+            if stage in run:
+                stages[stage].append(run[stage])
+        stages["scrape"].extend(run["scrape"])
+        stages["article"].extend(run["article"])
+    successful = sum(run.get("successful", 0) for run in runs)
+    failed = sum(run.get("failed", 0) for run in runs)
+    statuses = defaultdict(int)
+    for run in runs:
+        statuses[run.get("status", "unknown")] += 1
+    llm_calls = server.get("llm_calls", 0)
+    return {
+        "topics": len(runs),
+        "statuses": dict(statuses),
+        "articles": {"successful": successful, "failed": failed},
+        "throughput": {
+            "wall_seconds": round(wall, 3),
+            "topics_per_minute": round(len(runs) / wall * 60, 3) if wall else 0.0,
+            "articles_per_second": round(successful / wall, 3) if wall else 0.0,
+        },
+        "latency": {stage: percentiles(samples) for stage, samples in sorted(stages.items())},
+        "llm": {
+            "calls": llm_calls,
+            "calls_per_article": round(llm_calls / successful, 3) if successful else None,
+            "query_calls": server.get("llm_query_calls", 0),
+            "summary_calls": server.get("llm_summary_calls", 0),
+            "batch_summary_calls": server.get("llm_batch_summary_calls", 0),
+            "errors": server.get("llm_errors", 0),
+            "prompt_tokens": server.get("llm_prompt_tokens", 0),
+            "completion_tokens": server.get("llm_completion_tokens", 0),
+        },
+        "http": {
+            "search_requests": server.get("search_requests", 0),
+            "page_requests": server.get("page_requests", 0),
+            "page_errors": server.get("page_errors", 0),
+            "page_not_modified": server.get("page_not_modified", 0),
+            "page_bytes": server.get("page_bytes", 0),
+        },
+    }
+
+
+def lookup(result: Dict, dotted: str):
+    value = result
+    for part in dotted.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(before_path: str, after_path: str) -> int:
+    with open(before_path, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, encoding="utf-8") as f:
+        after = json.load(f)
+    if before.get("config") != after.get("config"):
+        print("⚠️ configs differ; numbers may not be comparable", file=sys.stderr)
+    label = lambda r: (r.get("revision", {}).get("commit") or "?")[:10]  # noqa: E731
+    print(f"{'metric':34} {label(before):>12} {label(after):>12} {'change':>9}")
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        old, new = lookup(before, "results." + metric), lookup(after, "results." + metric)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        better = change > 0 if higher_is_better else change < 0
+        mark = "" if abs(change) < 5 else ("✅" if better else "❌")
+        print(f"{metric:34} {old:>12} {new:>12} {change:>+8.1f}% {mark}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two result files")
+    parser.add_argument("--topics", type=int, default=10)
+    parser.add_argument("--topics-file", help="one topic per line; defaults to synthetic topics")
+    parser.add_argument("--parallel", type=int, default=2, help="research runs in flight at once")
+    parser.add_argument("--mode", choices=["direct", "batch"], default="direct")
+    parser.add_argument("--max-articles", type=int, default=5)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--deadline", type=float, default=None, help="per-run deadline in seconds")
+    parser.add_argument("--stream-summaries", action="store_true", help="stream summary text as it is generated")
+    parser.add_argument("--caches", action="store_true", help="enable the (initially empty) caches")
+    parser.add_argument("--extract-executor", choices=["process", "thread"], default="process")
+    parser.add_argument("--tracemalloc", action="store_true", help="also record the Python heap peak")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--quiet", action="store_true", help="silence pipeline logging")
+    add_arguments(parser)
+    args = parser.parse_args()
+    if args.compare:
+        return compare(*args.compare)
+
+    args.port = args.port or free_port()
+    base_url = f"http://127.0.0.1:{args.port}"
+    services = start_services(args.port, to_argv(args))
+    try:
+        with tempfile.TemporaryDirectory(prefix="research-bench-") as cache_dir:
+            configure_environment(args, base_url, cache_dir)
+            if args.tracemalloc:
+                tracemalloc.start()
+            logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="%(message)s")
+            import main as pipeline
+
+            # Pay for the lazily imported SDKs and parsers up front so the
+            # first topic's stage timings measure the pipeline, not imports.
+            for module in ("agents", "newspaper", "bs4"):
+                importlib.import_module(module)
+            pipeline.extraction_pool.start()
+
+            topics = topics_for(args)
+            started = time.perf_counter()
+            runs = asyncio.run(run_benchmark(pipeline, topics, args))
+            wall = time.perf_counter() - started
+            server = fetch_json(f"{base_url}/_stats")
+            results = summarize_runs(runs, wall, server)
+            from tools.telemetry import registry
+
+            results["pipeline_metrics"] = registry.snapshot()
+            # ru_maxrss is KiB on Linux and bytes on macOS.
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak_rss /= 1024 * (1024 if sys.platform == "darwin" else 1)
+            results["memory"] = {"peak_rss_mb": round(peak_rss, 1)}
+            if args.tracemalloc:
+                results["memory"]["peak_python_heap_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024**2, 1)
+                tracemalloc.stop()
+    finally:
+        services.terminate()
+        services.wait()
+
+    config = {
+        key: value for key, value in vars(args).items()
+        if key not in ("compare", "port", "output", "quiet", "tracemalloc")
+    }
+    report = {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "config": config,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✅ wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
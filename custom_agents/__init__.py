@@ -1,12 +1,49 @@
-from .query_agent import query_agent, QueryResponse, generate_query_test
-from .summarizer_agent import summarizer_agent, summarize_web, SummarizeInput, SummarizeOutput
+from . import summarizer_agent as _summarizer_module
+from .query_agent import QueryResponse, generate_query_test, get_query_agent
+from .summarizer_agent import (
+    summarize_direct,
+    summarize_long,
+    summarize_single,
+    summarize_with_agent,
+    summarize_batch,
+    plan_batches,
+    get_summarizer_agent,
+    BatchArticle,
+    BatchSummarizeOutput,
+    SummarizeInput,
+    SummarizeOutput,
+    SummaryResult,
+    SummaryUsage,
+)
+
+# ``query_agent`` and ``summarizer_agent`` stay the submodules, so imports and
+# patches of ``custom_agents.query_agent.X`` reach the module. The agents are
+# built lazily by get_query_agent() / get_summarizer_agent().
+_LAZY_EXPORTS = {
+    "summarize_web": _summarizer_module,
+}
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        return getattr(_LAZY_EXPORTS[name], name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
-    "query_agent",
     "QueryResponse",
     "generate_query_test",
-    "summarizer_agent",
+    "get_query_agent",
     "summarize_web",
+    "summarize_direct",
+    "summarize_long",
+    "summarize_single",
+    "summarize_with_agent",
+    "summarize_batch",
+    "plan_batches",
+    "get_summarizer_agent",
+    "BatchArticle",
+    "BatchSummarizeOutput",
     "SummarizeInput",
     "SummarizeOutput",
-]
\ No newline at end of file
+    "SummaryResult",
+    "SummaryUsage",
+]
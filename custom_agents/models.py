@@ -0,0 +1,64 @@
+import os
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from dotenv import load_dotenv
+from tools.concurrency import rate_limiter_from_env, stage_limiter
+
+load_dotenv()
+
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
+
+# Every model request in the process shares these: at most LLM_CONCURRENCY
+# in flight and, when LLM_REQUESTS_PER_MINUTE is set, a token-bucket rate.
+llm_rate_limiter = rate_limiter_from_env("LLM_REQUESTS")
+
+
+@asynccontextmanager
+async def llm_slot():
+    """Hold one of the process-wide model request slots"""
+    async with stage_limiter("llm"):
+        if llm_rate_limiter is not None:
+            await llm_rate_limiter.acquire()
+        yield
+
+
+@lru_cache(maxsize=None)
+def get_api_key() -> str:
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        raise ValueError("GEMINI_API_KEY not found in .env")
+    return gemini_api_key
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """The one AsyncOpenAI client (pointed at Gemini) shared by every agent"""
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=get_api_key(), base_url=GEMINI_BASE_URL)
+
+
+@lru_cache(maxsize=None)
+def _limited_model_class():
+    from agents import OpenAIChatCompletionsModel
+
+    class LimitedChatCompletionsModel(OpenAIChatCompletionsModel):
+        """Takes an llm_slot() around each request, so agent turns and tool
+        calls never hold a slot while waiting on each other"""
+
+        async def get_response(self, *args, **kwargs):
+            async with llm_slot():
+                return await super().get_response(*args, **kwargs)
+
+        async def stream_response(self, *args, **kwargs):
+            async with llm_slot():
+                async for event in super().stream_response(*args, **kwargs):
+                    yield event
+
+    return LimitedChatCompletionsModel
+
+
+@lru_cache(maxsize=None)
+def get_model(name: str):
+    """Chat-completions model wrapper for ``name``, built once per name"""
+    return _limited_model_class()(model=name, openai_client=get_client())
@@ -1,33 +1,9 @@
-import os
 import asyncio
-from agents import Agent, Runner, OpenAIChatCompletionsModel, RunConfig
-from openai import AsyncOpenAI
+from functools import lru_cache
 from pydantic import BaseModel
-import google.generativeai as genai
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Load Gemini API Key
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-if not gemini_api_key:
-    raise ValueError("GEMINI_API_KEY not found in .env")
-
-# Configure Gemini
-genai.configure(api_key=gemini_api_key)
-external_client = AsyncOpenAI(
-    api_key=gemini_api_key,
-    base_url="https://generativelanguage.googleapis.com/v1beta",
-)
-model = OpenAIChatCompletionsModel(
-    model="gemini-2.0-flash",
-    openai_client=external_client,
-)
-config = RunConfig(
-    model=model,
-    model_provider=external_client,
-    tracing_disabled=True,
-)
+from .models import get_client, get_model
+
+QUERY_MODEL = "gemini-2.0-flash"
 
 # Agent instructions
 QUERY_AGENT_PROMPT = """
@@ -38,17 +14,34 @@ class QueryResponse(BaseModel):
     queries: list[str]
     thought: str
 
-query_agent = Agent(
-    name="Query Generator Agent",
-    instructions=QUERY_AGENT_PROMPT,
-    output_type=QueryResponse,
-    model=model,
-)
+@lru_cache(maxsize=None)
+def get_query_agent():
+    from agents import Agent
+
+    return Agent(
+        name="Query Generator Agent",
+        instructions=QUERY_AGENT_PROMPT,
+        output_type=QueryResponse,
+        model=get_model(QUERY_MODEL),
+    )
+
+def __getattr__(name: str):
+    # Agents, the model and the client are built on first access so importing
+    # this module doesn't pull in the agents SDK or need an API key.
+    if name == "query_agent":
+        return get_query_agent()
+    if name == "model":
+        return get_model(QUERY_MODEL)
+    if name == "external_client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ✅ Clean test function
 async def generate_query_test(query: str):
+    from agents import Runner
+
     print("🔍 Input Query:", query)
-    result = await Runner.run(query_agent, input=query)
+    result = await Runner.run(get_query_agent(), input=query)
     output: QueryResponse = result.final_output
     print("\n🧠 Thought Process:\n", output.thought)
     print("\n🔎 Generated Queries:")
@@ -1,37 +1,35 @@
 import os
+import re
+import json
 import asyncio
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Callable, Optional
 from pydantic import BaseModel
-from agents import Agent, Runner, OpenAIChatCompletionsModel, function_tool
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
-import google.generativeai as genai
+from tools.telemetry import RETRIES
+from .models import get_client, get_model
 
-load_dotenv()
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-if not gemini_api_key:
-    raise ValueError("GEMINI_API_KEY not found in .env file")
+logger = logging.getLogger(__name__)
 
-genai.configure(api_key=gemini_api_key)
+SUMMARIZER_MODEL = "gemini-1.5-flash"
 
-external_client = AsyncOpenAI(
-    api_key=gemini_api_key,
-    base_url="https://generativelanguage.googleapis.com/v1beta"
-)
+# Batch mode packs several articles into one request up to this estimated
+# prompt size.
+BATCH_TOKEN_BUDGET = int(os.getenv("SUMMARY_BATCH_TOKEN_BUDGET", "24000"))
+BATCH_MAX_ARTICLES = int(os.getenv("SUMMARY_BATCH_MAX_ARTICLES", "8"))
 
-model = OpenAIChatCompletionsModel(
-    model="gemini-1.5-flash",
-    openai_client=external_client
-)
+# Articles above LONG_DOCUMENT_TOKENS are split into CHUNK_TOKENS-sized parts
+# that are summarized in parallel and then merged (map-reduce).
+LONG_DOCUMENT_TOKENS = int(os.getenv("SUMMARY_LONG_DOCUMENT_TOKENS", "12000"))
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "4000"))
+CHUNK_CONCURRENCY = int(os.getenv("SUMMARY_CHUNK_CONCURRENCY", "4"))
 
-class SummarizeInput(BaseModel):
-    title: str
-    content: str
-
-class SummarizeOutput(BaseModel):
-    summary: str
+# Streamed summary text is handed on at most this often (seconds), so a fast
+# model doesn't produce one UI update per token.
+STREAM_FLUSH_SECONDS = float(os.getenv("SUMMARY_STREAM_FLUSH_SECONDS", "0.05"))
 
-async def summarize_web_core(data: SummarizeInput) -> SummarizeOutput:
-    prompt = f"""
+SUMMARIZER_GUIDELINES = """
 You are a highly skilled research summarization agent.
 
 Your task is to generate a clear, accurate, and professional summary of the article based on the title and full content provided. Follow these strict guidelines:
@@ -55,39 +53,476 @@ Your task is to generate a clear, accurate, and professional summary of the arti
    - Target ~10–20% of the original content’s length.
    - Be concise without losing essential information.
 
-Input:
-Title: {data.title}
+"""
+
+SUMMARIZER_PROMPT = SUMMARIZER_GUIDELINES + """Input:
+Title: {title}
 
 Content:
 \"\"\"
-{data.content}
+{content}
 \"\"\"
 
 Respond with only the final summary. Do not include any explanations or extra text.
 
 Summary:
+"""
+
+BATCH_SUMMARIZER_PROMPT = SUMMARIZER_GUIDELINES + """You will receive several articles, each tagged with its URL. Summarize every article
+independently using the guidelines above, and never mix facts between articles.
+
+Return exactly one entry per article, with its URL copied exactly as given and its summary.
+
+Articles:
+{articles}
+"""
+
+BATCH_ARTICLE_TEMPLATE = """[Article {index}]
+URL: {url}
+Title: {title}
+
+Content:
+\"\"\"
+{content}
+\"\"\"
+"""
+
+CHUNK_SUMMARIZER_PROMPT = SUMMARIZER_GUIDELINES + """This is part {index} of {total} of a longer article. Summarize only what appears in this part.
+
+Title: {title}
+
+Content:
+\"\"\"
+{content}
+\"\"\"
+
+Respond with only the summary of this part.
+"""
+
+REDUCE_SUMMARIZER_PROMPT = SUMMARIZER_GUIDELINES + """The article below was too long to summarize in one pass, so each part was summarized separately.
+Combine the partial summaries into one summary of the whole article, removing repetition between parts.
+
+Title: {title}
+
+Partial summaries:
+{partials}
+
+Respond with only the final summary. Do not include any explanations or extra text.
+"""
+
+SUMMARIZER_INSTRUCTIONS = "Summarize articles using the summarize_web tool"
+
+# Bumps automatically whenever the prompt, agent instructions or model change,
+# so anything cached under the old version stops matching.
+SUMMARIZER_PROMPT_VERSION = hashlib.sha256(
+    "".join([
+        SUMMARIZER_MODEL,
+        SUMMARIZER_INSTRUCTIONS,
+        SUMMARIZER_PROMPT,
+        BATCH_SUMMARIZER_PROMPT,
+        CHUNK_SUMMARIZER_PROMPT,
+        REDUCE_SUMMARIZER_PROMPT,
+    ]).encode("utf-8")
+).hexdigest()[:12]
+
+class SummarizeInput(BaseModel):
+    title: str
+    content: str
+
+class SummarizeOutput(BaseModel):
+    summary: str
+
+class SummaryUsage(BaseModel):
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+
+    def __add__(self, other: "SummaryUsage") -> "SummaryUsage":
+        return SummaryUsage(
+            requests=self.requests + other.requests,
+            input_tokens=self.input_tokens + other.input_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+            total_tokens=self.total_tokens + other.total_tokens,
+        )
+
+    @classmethod
+    def from_result(cls, result) -> "SummaryUsage":
+        usage = result.context_wrapper.usage
+        return cls(
+            requests=usage.requests,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            total_tokens=usage.total_tokens,
+        )
+
+class SummaryResult(BaseModel):
+    summary: str
+    usage: SummaryUsage
+    mode: str
+
+# Single-call engine: the full prompt goes straight to the model with a
+# structured output type, no routing turn and no tool call.
+@lru_cache(maxsize=None)
+def get_direct_summarizer_agent():
+    from agents import Agent, ModelSettings
+
+    return Agent(
+        name="direct-summarizer",
+        instructions="",
+        model=get_model(SUMMARIZER_MODEL),
+        # Streamed replies only report token usage when asked to.
+        model_settings=ModelSettings(include_usage=True),
+        output_type=SummarizeOutput
+    )
+
+async def _run_summary_prompt(prompt: str) -> tuple[str, SummaryUsage]:
+    from agents import Runner
+
+    result = await Runner.run(
+        get_direct_summarizer_agent(),
+        input=[{"role": "user", "content": prompt}],
+        max_turns=1
+    )
+    return result.final_output.summary, SummaryUsage.from_result(result)
+
+# Called with each new piece of summary text while the model is generating it
+PartialCallback = Callable[[str], None]
+
+class PartialJsonString:
+    """Decodes one string field of a JSON object while the object is still being generated.
+
+    ``feed`` takes the next raw chunk and returns the field text that became
+    complete with it; escapes split across chunks are held back until whole.
     """
-    input_message = [{"role": "user", "content": prompt}]
-    
-    response = await Runner.run(
-        instructions="",  
-        model=model,
-        input=input_message,
+
+    def __init__(self, field: str):
+        self._start = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._position: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        if self._position is None:
+            match = self._start.search(self._buffer)
+            if match is None:
+                return ""
+            self._position = match.end()
+        out = []
+        buffer, i = self._buffer, self._position
+        while i < len(buffer) and not self.done:
+            char = buffer[i]
+            if char == '"':
+                self.done = True
+                i += 1
+            elif char == "\\":
+                length = 6 if buffer[i + 1:i + 2] == "u" else 2
+                if length == 6 and "\ud800" <= json.loads('"%s"' % buffer[i:i + 6].ljust(6, "0")) <= "\udbff":
+                    # First half of a surrogate pair; decode both halves together.
+                    length = 12
+                if i + length > len(buffer):
+                    break
+                out.append(json.loads('"%s"' % buffer[i:i + length]))
+                i += length
+            else:
+                out.append(char)
+                i += 1
+        self._position = i
+        return "".join(out)
+
+
+async def _stream_summary_prompt(prompt: str, on_partial: PartialCallback) -> tuple[str, SummaryUsage]:
+    """_run_summary_prompt, handing summary text to ``on_partial`` as it is generated.
+
+    The streamed JSON is still validated against SummarizeOutput at the end,
+    so callers get exactly what the non-streaming path would return.
+    """
+    from agents import Runner
+
+    result = Runner.run_streamed(
+        get_direct_summarizer_agent(),
+        input=[{"role": "user", "content": prompt}],
+        max_turns=1
+    )
+    loop = asyncio.get_running_loop()
+    reader = PartialJsonString("summary")
+    raw, pending = [], []
+    flushed_at = loop.time()
+    async for event in result.stream_events():
+        if event.type != "raw_response_event" or event.data.type != "response.output_text.delta":
+            continue
+        raw.append(event.data.delta)
+        pending.append(reader.feed(event.data.delta))
+        if loop.time() - flushed_at >= STREAM_FLUSH_SECONDS and any(pending):
+            on_partial("".join(pending))
+            pending, flushed_at = [], loop.time()
+    if any(pending):
+        on_partial("".join(pending))
+
+    output = SummarizeOutput.model_validate_json("".join(raw)) if raw else result.final_output
+    return output.summary, SummaryUsage.from_result(result)
+
+async def _summary_prompt(prompt: str, on_partial: Optional[PartialCallback] = None) -> tuple[str, SummaryUsage]:
+    if on_partial is None:
+        return await _run_summary_prompt(prompt)
+    return await _stream_summary_prompt(prompt, on_partial)
+
+async def summarize_direct(
+    data: SummarizeInput,
+    on_partial: Optional[PartialCallback] = None,
+) -> SummaryResult:
+    summary, usage = await _summary_prompt(
+        SUMMARIZER_PROMPT.format(title=data.title, content=data.content), on_partial
+    )
+    return SummaryResult(summary=summary, usage=usage, mode="direct")
+
+class BatchArticle(BaseModel):
+    url: str
+    title: str
+    content: str
+
+class ArticleSummary(BaseModel):
+    url: str
+    summary: str
+
+class BatchSummarizeOutput(BaseModel):
+    summaries: list[ArticleSummary]
+
+class BatchSummaryResult(BaseModel):
+    summaries: dict[str, str]
+    usage: SummaryUsage
+    fallbacks: int = 0
+
+@lru_cache(maxsize=None)
+def get_batch_summarizer_agent():
+    from agents import Agent
+
+    return Agent(
+        name="batch-summarizer",
+        instructions="",
+        model=get_model(SUMMARIZER_MODEL),
+        output_type=BatchSummarizeOutput
+    )
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) for budgeting requests"""
+    return len(text) // 4 + 1
+
+def is_long_document(content: str) -> bool:
+    return estimate_tokens(content) > LONG_DOCUMENT_TOKENS
+
+def split_into_chunks(text: str, chunk_tokens: int = CHUNK_TOKENS) -> list[str]:
+    """Split text on paragraph boundaries into chunks of at most chunk_tokens.
+
+    A single paragraph longer than the limit is hard-split by characters.
+    """
+    max_chars = chunk_tokens * 4
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)]
+        for piece in pieces:
+            if current and size + len(piece) > max_chars:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def plan_batches(
+    articles: list[BatchArticle],
+    token_budget: int = BATCH_TOKEN_BUDGET,
+    max_batch_size: int = BATCH_MAX_ARTICLES,
+) -> list[list[BatchArticle]]:
+    """Greedily pack articles into batches whose prompts fit the token budget.
+
+    An article that is too big to share a request ends up in a batch of one.
+    """
+    overhead = estimate_tokens(BATCH_SUMMARIZER_PROMPT)
+    batches: list[list[BatchArticle]] = []
+    current: list[BatchArticle] = []
+    used = overhead
+    for article in articles:
+        if is_long_document(article.content):
+            # Long articles go through the map-reduce path on their own.
+            batches.append([article])
+            continue
+        cost = estimate_tokens(article.title) + estimate_tokens(article.content) + 20
+        if current and (used + cost > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current, used = [], overhead
+        current.append(article)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+async def summarize_batch(articles: list[BatchArticle]) -> BatchSummaryResult:
+    """Summarize several articles in one request, falling back to one call each.
+
+    If the batch request fails or its output leaves articles out, the missing
+    ones are summarized individually with summarize_single.
+    """
+    from agents import Runner
+
+    summaries: dict[str, str] = {}
+    usage = SummaryUsage()
+    if len(articles) > 1:
+        blocks = "\n".join(
+            BATCH_ARTICLE_TEMPLATE.format(index=i, url=a.url, title=a.title, content=a.content)
+            for i, a in enumerate(articles, 1)
+        )
+        try:
+            result = await Runner.run(
+                get_batch_summarizer_agent(),
+                input=[{"role": "user", "content": BATCH_SUMMARIZER_PROMPT.format(articles=blocks)}],
+                max_turns=1
+            )
+            usage += SummaryUsage.from_result(result)
+            wanted = {a.url for a in articles}
+            for item in result.final_output.summaries:
+                if item.url in wanted and item.summary.strip():
+                    summaries[item.url] = item.summary
+        except Exception as e:
+            logger.warning("⚠️ Batch summarization failed, falling back to per-article calls: %s", e)
+
+    missing = [a for a in articles if a.url not in summaries]
+    if missing and len(articles) > 1:
+        RETRIES.inc(len(missing), stage="summarize")
+    fallbacks = await asyncio.gather(
+        *(summarize_single(SummarizeInput(title=a.title, content=a.content)) for a in missing),
+        return_exceptions=True
+    )
+    for article, fallback in zip(missing, fallbacks):
+        if isinstance(fallback, BaseException):
+            logger.warning("⚠️ Summarization failed for %s: %s", article.url, fallback)
+            continue
+        summaries[article.url] = fallback.summary
+        usage += fallback.usage
+
+    return BatchSummaryResult(
+        summaries=summaries,
+        usage=usage,
+        fallbacks=len(missing) if len(articles) > 1 else 0
+    )
+
+async def summarize_long(
+    data: SummarizeInput,
+    chunk_tokens: int = CHUNK_TOKENS,
+    concurrency: int = CHUNK_CONCURRENCY,
+    on_partial: Optional[PartialCallback] = None,
+) -> SummaryResult:
+    """Map-reduce summary: summarize chunks concurrently, then merge the parts.
+
+    With ``on_partial`` only the final merge is streamed; chunk summaries
+    aren't shown.
+    """
+    chunks = split_into_chunks(data.content, chunk_tokens)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def map_chunk(index: int, chunk: str) -> tuple[str, SummaryUsage]:
+        async with limit:
+            return await _run_summary_prompt(CHUNK_SUMMARIZER_PROMPT.format(
+                index=index, total=len(chunks), title=data.title, content=chunk
+            ))
+
+    mapped = await asyncio.gather(*(map_chunk(i, c) for i, c in enumerate(chunks, 1)))
+    usage = SummaryUsage()
+    for _, chunk_usage in mapped:
+        usage += chunk_usage
+    partials = "\n\n".join(f"[Part {i}]\n{summary}" for i, (summary, _) in enumerate(mapped, 1))
+
+    if is_long_document(partials) and len(partials) < len(data.content):
+        # Even the partial summaries are too big for one request; go another round.
+        reduced = await summarize_long(
+            SummarizeInput(title=data.title, content=partials), chunk_tokens, concurrency, on_partial
+        )
+        return SummaryResult(summary=reduced.summary, usage=usage + reduced.usage, mode="map-reduce")
+
+    summary, reduce_usage = await _summary_prompt(
+        REDUCE_SUMMARIZER_PROMPT.format(title=data.title, partials=partials), on_partial
+    )
+    return SummaryResult(summary=summary, usage=usage + reduce_usage, mode="map-reduce")
+
+async def summarize_single(
+    data: SummarizeInput,
+    on_partial: Optional[PartialCallback] = None,
+) -> SummaryResult:
+    """One call for normal articles, map-reduce for long ones.
+
+    ``on_partial`` receives the summary text piece by piece as the model
+    generates it.
+    """
+    if is_long_document(data.content):
+        return await summarize_long(data, on_partial=on_partial)
+    return await summarize_direct(data, on_partial)
+
+async def summarize_web_core(data: SummarizeInput) -> SummarizeOutput:
+    result = await summarize_single(data)
+    return SummarizeOutput(summary=result.summary)
+
+@lru_cache(maxsize=None)
+def get_summarize_web_tool():
+    from agents import function_tool
+
+    @function_tool
+    async def summarize_web(data: SummarizeInput) -> SummarizeOutput:
+        return await summarize_web_core(data)
+
+    return summarize_web
+
+@lru_cache(maxsize=None)
+def get_summarizer_agent():
+    from agents import Agent
+
+    return Agent(
+        name="summarizer-agent",
+        instructions=SUMMARIZER_INSTRUCTIONS,
+        tools=[get_summarize_web_tool()],
+        model=get_model(SUMMARIZER_MODEL),
         output_type=SummarizeOutput
     )
-    return response.final_output
 
-@function_tool
-async def summarize_web(data: SummarizeInput) -> SummarizeOutput:
-    return await summarize_web_core(data)
+_LAZY_ATTRIBUTES = {
+    "summarizer_agent": get_summarizer_agent,
+    "summarize_web": get_summarize_web_tool,
+    "direct_summarizer_agent": get_direct_summarizer_agent,
+    "batch_summarizer_agent": get_batch_summarizer_agent,
+    "model": lambda: get_model(SUMMARIZER_MODEL),
+    "external_client": get_client,
+}
+
+def __getattr__(name: str):
+    # Agents and clients are built on first access so importing this module
+    # stays cheap and doesn't need an API key.
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-summarizer_agent = Agent(
-    name="summarizer-agent",
-    instructions="Summarize articles using the summarize_web tool",
-    tools=[summarize_web],
-    model=model,
-    output_type=SummarizeOutput
-)
+async def summarize_with_agent(data: SummarizeInput) -> SummaryResult:
+    """Legacy mode: the agent routes to the summarize_web tool (two model calls).
+
+    The reported usage only covers the outer agent; the tool's own call is
+    billed separately.
+    """
+    from agents import Runner
+
+    result = await Runner.run(
+        get_summarizer_agent(),
+        input=[{"role": "user", "content": f"Title: {data.title}\nContent: {data.content}"}]
+    )
+    return SummaryResult(
+        summary=result.final_output.summary,
+        usage=SummaryUsage.from_result(result),
+        mode="agent"
+    )
 
 # Test execution
 async def main():
@@ -106,8 +541,10 @@ async def main():
         {"role": "user", "content": f"Title: {test_input.title}\nContent: {test_input.content}"}
     ]
     
+    from agents import Runner
+
     result = await Runner.run(
-        summarizer_agent,
+        get_summarizer_agent(),
         input=input_message
     )
     
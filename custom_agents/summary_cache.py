@@ -0,0 +1,51 @@
+import os
+import hashlib
+from typing import Optional
+from tools.cache import SQLiteCache, cache_path, make_key
+from tools.telemetry import CACHE_REQUESTS
+
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "1") == "1"
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", str(7 * 24 * 3600)))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "10000"))
+
+
+def content_hash(content: str) -> str:
+    """Hash of whitespace-normalized content, so reflowed copies match"""
+    normalized = " ".join(content.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """Persistent summaries keyed by (content hash, title, model, prompt version)"""
+
+    def __init__(self, store: SQLiteCache):
+        self.store = store
+
+    @staticmethod
+    def key(title: str, content: str, model: str, prompt_version: str) -> str:
+        return make_key("summary", content_hash(content), title.strip(), model, prompt_version)
+
+    def get(self, title: str, content: str, model: str, prompt_version: str) -> Optional[str]:
+        entry = self.store.get(self.key(title, content, model, prompt_version))
+        CACHE_REQUESTS.inc(cache="summary", result="hit" if entry else "miss")
+        return entry["summary"] if entry else None
+
+    def put(self, title: str, content: str, model: str, prompt_version: str, summary: str) -> None:
+        self.store.set(self.key(title, content, model, prompt_version), {"summary": summary})
+
+    def stats(self):
+        return self.store.stats()
+
+
+summary_cache = (
+    SummaryCache(
+        SQLiteCache(
+            cache_path("summaries.sqlite3"),
+            table="summaries",
+            ttl_seconds=SUMMARY_CACHE_TTL,
+            max_entries=SUMMARY_CACHE_MAX_ENTRIES,
+        )
+    )
+    if SUMMARY_CACHE_ENABLED
+    else None
+)
@@ -1,20 +1,107 @@
 import asyncio
-from typing import List, Dict, Optional, AsyncGenerator
+import logging
+import math
+import os
+from functools import partial
+from typing import List, Dict, Optional, AsyncGenerator, Callable, Literal, Union
 from pydantic import BaseModel
 from datetime import datetime
-from custom_agents.query_agent import query_agent
-from custom_agents.summarizer_agent import summarizer_agent, SummarizeInput
-from tools.search_tool import search_web
-from tools.scrapper_tool import smart_scrape_url
-from agents import Runner
+from custom_agents.query_agent import get_query_agent, QUERY_MODEL
+from custom_agents.summarizer_agent import (
+    summarize_single,
+    summarize_with_agent,
+    summarize_batch,
+    plan_batches,
+    BatchArticle,
+    PartialCallback,
+    SummarizeInput,
+    SummaryUsage,
+    SUMMARIZER_MODEL,
+    SUMMARIZER_PROMPT_VERSION,
+)
+from custom_agents.summary_cache import summary_cache, content_hash
+from tools.search_tool import search_many
+from tools.scrapper_tool import FetchError
+from tools.extraction import extraction_pool
+from tools.fetch_scheduler import fetch_scheduler
+from tools.concurrency import ConcurrencyLimiter, stage_limiter
+from tools.scrape_cache import scrape_cache
+from tools.ranking import PREFLIGHT_ENABLED, preflight, rank_items
+from tools.content_store import content_store, preview
+from tools.result_cache import result_cache
+from tools.urls import dedupe_urls, dedup_key
+from tools.singleflight import SingleFlight
+from tools.dedup import NearDuplicateIndex, simhash
+from tools.telemetry import RUNS, Span, maybe_start_metrics_server, record_llm_usage, span
+
+logger = logging.getLogger(__name__)
+
+# How many search hits a run scrapes and summarizes
+DEFAULT_MAX_ARTICLES = int(os.getenv("MAX_ARTICLES", "5"))
+
+# Deadline-driven runs scrape this many extra candidates per wanted article
+HEDGE_RATIO = float(os.getenv("HEDGE_RATIO", "1.0"))
+
+# Per-run cap on articles processed at once, plus a process-wide cap shared by
+# every concurrent research run so we stay under provider rate limits.
+MAX_CONCURRENT_ARTICLES = int(os.getenv("MAX_CONCURRENT_ARTICLES", "5"))
+GLOBAL_ARTICLE_LIMIT = int(os.getenv("GLOBAL_ARTICLE_LIMIT", "10"))
+article_limiter = ConcurrencyLimiter(GLOBAL_ARTICLE_LIMIT)
+
+# "direct" makes one structured-output call per article, "batch" packs several
+# articles into each request, and "agent" keeps the old summarizer_agent ->
+# summarize_web tool route.
+SUMMARIZER_MODE = os.getenv("SUMMARIZER_MODE", "direct")
+
+# SimHash bits two articles may differ by and still count as the same text.
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "4"))
+
+# Cached research is only reused by runs with the same models and prompts.
+RESULT_CACHE_VARIANT = f"{QUERY_MODEL}|{SUMMARIZER_MODEL}|{SUMMARIZER_PROMPT_VERSION}"
+
+# Concurrent scrapes of the same URL and summaries of the same text, from any
+# run on the loop, share one execution.
+scrape_flight = SingleFlight("scrape")
+summary_flight = SingleFlight("summary")
 
 # Define output schemas
 class ArticleData(BaseModel):
     url: str
     title: str
-    content: str
+    content: str  # the first ARTICLE_PREVIEW_CHARS characters of the text
     summary: Optional[str] = None
     error: Optional[str] = None
+    content_id: Optional[str] = None  # handle to the full text in content_store
+    content_length: int = 0
+
+    @classmethod
+    def from_text(cls, url: str, title: str, text: str, **fields) -> "ArticleData":
+        """Keep a preview of ``text`` in memory and the full text in the content store"""
+        short = preview(text)
+        return cls(
+            url=url,
+            title=title,
+            content=short,
+            content_id=content_store.save(text) if short != text else None,
+            content_length=len(text),
+            **fields
+        )
+
+    def full_content(self) -> str:
+        """The full article text, read from disk on demand (the preview if it was evicted)"""
+        if self.content_id is None:
+            return self.content
+        return content_store.load(self.content_id) or self.content
+
+    def export_record(self) -> Dict:
+        """Flat row with the full text, for CSV/JSONL exports"""
+        return {
+            "url": self.url,
+            "title": self.title,
+            "summary": self.summary,
+            "error": self.error,
+            "content": self.full_content(),
+        }
 
 class ResearchOutput(BaseModel):
     query: str
@@ -26,136 +113,738 @@ class ResearchOutput(BaseModel):
     duration_seconds: float
     thought: Optional[str] = None  # <-- Added
     queries: Optional[List[str]] = None  # <-- Added to pass queries to UI
+    stage_seconds: Optional[Dict[str, float]] = None  # summed span time per stage
 
-async def scrape_with_retries(url: str, retries: int = 3, delay: float = 1.5) -> Optional[Dict]:
-    for attempt in range(1, retries + 1):
-        try:
-            result = await asyncio.to_thread(smart_scrape_url, url)
-            if result and isinstance(result, dict) and "text" in result and len(result["text"]) > 200:
-                print(f"✅ Success: {url}")
-                return result
-            else:
-                print(f"⚠️ Attempt {attempt}: Invalid or short content for {url}")
-        except Exception as e:
-            print(f"❌ Attempt {attempt} failed for {url}: {e}")
-            if attempt < retries:
-                await asyncio.sleep(delay)
-    print(f"⛔ Giving up on: {url}")
-    return None
-
-async def summarize_article(title: str, content: str) -> str:
+# Delta events emitted by run_research_events
+class QueriesGenerated(BaseModel):
+    type: Literal["queries_generated"] = "queries_generated"
+    queries: List[str]
+    thought: Optional[str] = None
+    reused_from: Optional[str] = None  # earlier, similar topic whose research is being reused
+
+class SearchDone(BaseModel):
+    type: Literal["search_done"] = "search_done"
+    urls: List[str]
+    errors: Dict[str, str] = {}
+    dropped: Dict[str, str] = {}  # search hits not worth scraping, with the reason
+
+class ArticleScraped(BaseModel):
+    type: Literal["article_scraped"] = "article_scraped"
+    url: str
+    title: str
+    method: Optional[str] = None
+    content_length: int
+
+class SummaryDelta(BaseModel):
+    type: Literal["summary_delta"] = "summary_delta"
+    url: str
+    delta: str  # summary text generated since the previous delta for this url
+
+class ArticleSummarized(BaseModel):
+    type: Literal["article_summarized"] = "article_summarized"
+    article: ArticleData
+    successful: int
+    failed: int
+    total: int
+
+class ArticleFailed(BaseModel):
+    type: Literal["article_failed"] = "article_failed"
+    article: ArticleData
+    successful: int
+    failed: int
+    total: int
+
+class Completed(BaseModel):
+    type: Literal["completed"] = "completed"
+    status: str
+    successful: int = 0
+    failed: int = 0
+    total: int = 0
+    duration_seconds: float
+    stage_seconds: Dict[str, float] = {}
+
+ResearchEvent = Union[
+    QueriesGenerated, SearchDone, ArticleScraped, SummaryDelta, ArticleSummarized, ArticleFailed, Completed
+]
+
+# Called with (url, scrape result) as soon as an article has been scraped
+ScrapeCallback = Callable[[str, Dict], None]
+
+# Called with (url, new summary text) while a summary is being generated
+SummaryDeltaCallback = Callable[[str, str], None]
+
+class DuplicateTracker:
+    """Lets near-duplicate articles in one run share a single summary.
+
+    The first article with a given text registers a future; later articles
+    whose SimHash is close enough wait on it instead of calling the model.
+    """
+
+    def __init__(self, max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE):
+        self.index = NearDuplicateIndex(max_distance)
+        self.summaries: Dict[str, asyncio.Future] = {}
+
+    async def claim(self, url: str, text: str) -> Optional[asyncio.Future]:
+        """Return the original's summary future if this text is a near-duplicate"""
+        fingerprint = await asyncio.to_thread(simhash, text)
+        original = self.index.find_or_add(url, fingerprint)
+        if original is not None:
+            return self.summaries[original]
+        self.summaries[url] = asyncio.get_running_loop().create_future()
+        return None
+
+    def resolve(self, url: str, summary: Optional[str]) -> None:
+        future = self.summaries.get(url)
+        if future is not None and not future.done():
+            future.set_result(summary)
+
+async def scrape_with_retries(
+    url: str,
+    retries: Optional[int] = None,
+    delay: Optional[float] = None,
+) -> Optional[Dict]:
+    """Download once, re-fetching only when the network step itself fails.
+
+    Retries, backoff, per-host limits and circuit breaking are handled by the
+    shared fetch_scheduler; ``delay`` overrides its base backoff. Callers
+    asking for the same URL at the same time share a single scrape.
+    """
+    return await scrape_flight.do(dedup_key(url), lambda: _scrape(url, retries, delay))
+
+async def _scrape(url: str, retries: Optional[int], delay: Optional[float]) -> Optional[Dict]:
+    with span("scrape", url=url) as current:
+        conditional_headers: Dict[str, str] = {}
+        if scrape_cache is not None:
+            cached, conditional_headers = scrape_cache.lookup(url)
+            if cached:
+                logger.info("💾 Cache hit: %s", url)
+                current.set(cache="hit")
+                return cached
+
+        # The queue slot is held from download to extraction, bounding the
+        # raw pages in memory when extraction falls behind.
+        async with extraction_pool.queue_slot():
+            try:
+                page = await fetch_scheduler.fetch(url, conditional_headers or None, retries, delay)
+                if page.status == 304 and scrape_cache is not None:
+                    cached = scrape_cache.revalidated_result(url, page.headers)
+                    if cached:
+                        logger.info("♻️ Not modified, reusing cached extraction: %s", url)
+                        current.set(cache="revalidated")
+                        return cached
+                    conditional_headers = {}
+                    page = await fetch_scheduler.fetch(url, None, retries, delay)
+            except FetchError as e:
+                logger.warning("❌ Fetch failed for %s: %s", url, e)
+                logger.warning("⛔ Giving up on: %s", url)
+                current.end("error")
+                return None
+
+            # Extraction is deterministic for the same bytes, so a short or
+            # broken result isn't worth downloading again.
+            result = await extraction_pool.extract(page)
+        if result and isinstance(result, dict) and "text" in result and len(result["text"]) > 200:
+            logger.info("✅ Success: %s", url)
+            if scrape_cache is not None:
+                scrape_cache.put(url, result, page.headers, refetched=bool(conditional_headers))
+            return result
+        logger.warning("⚠️ Invalid or short content for %s", url)
+        logger.warning("⛔ Giving up on: %s", url)
+        current.end("error")
+        return None
+
+def cached_summary(title: str, content: str) -> Optional[str]:
+    if summary_cache is None:
+        return None
+    cached = summary_cache.get(title, content, SUMMARIZER_MODEL, SUMMARIZER_PROMPT_VERSION)
+    if cached is not None:
+        logger.info("💾 Summary cache hit: %s", title)
+    return cached
+
+def remember_summary(title: str, content: str, summary: Optional[str]) -> None:
+    if summary_cache is not None and summary:
+        summary_cache.put(title, content, SUMMARIZER_MODEL, SUMMARIZER_PROMPT_VERSION, summary)
+
+def log_usage(mode: str, usage: SummaryUsage) -> None:
+    logger.info(
+        "🧾 Summary tokens (%s): %d in / %d out over %d request(s)",
+        mode, usage.input_tokens, usage.output_tokens, usage.requests
+    )
+    record_llm_usage("summarize", SUMMARIZER_MODEL, usage.input_tokens, usage.output_tokens, usage.requests)
+
+async def summarize_article(
+    title: str,
+    content: str,
+    mode: Optional[str] = None,
+    on_partial: Optional[PartialCallback] = None,
+) -> str:
+    """Summarize one article; mode is "direct" (one call, map-reduce when long) or "agent".
+
+    Identical (title, text, mode) requests in flight at once share one call.
+    In direct mode ``on_partial`` receives the summary text as it is
+    generated; callers that join a call already in flight only get the result.
+    """
+    mode = mode or SUMMARIZER_MODE
+    key = (title.strip(), content_hash(content), mode)
+    return await summary_flight.do(key, lambda: _summarize_article(title, content, mode, on_partial))
+
+async def _summarize_article(
+    title: str,
+    content: str,
+    mode: str,
+    on_partial: Optional[PartialCallback] = None,
+) -> Optional[str]:
+    cached = cached_summary(title, content)
+    if cached is not None:
+        return cached
+    data = SummarizeInput(title=title, content=content)
     try:
-        input_data = SummarizeInput(title=title, content=content)
-        summary_result = await Runner.run(
-            summarizer_agent,
-            input=[{"role": "user", "content": f"Title: {title}\nContent: {content}"}]
-        )
-        return summary_result.final_output.summary
+        async with stage_limiter("summarize"):
+            with span("summarize", mode=mode, title=title, streamed=on_partial is not None):
+                if mode == "agent":
+                    result = await summarize_with_agent(data)
+                else:
+                    result = await summarize_single(data, on_partial)
     except Exception as e:
-        print(f"⚠️ Summarization failed: {e}")
+        logger.warning("⚠️ Summarization failed: %s", e)
         return None
+    log_usage(result.mode, result.usage)
+    remember_summary(title, content, result.summary)
+    return result.summary
 
-async def process_article(url: str) -> ArticleData:
+async def process_article(
+    url: str,
+    summary_mode: Optional[str] = None,
+    duplicates: Optional[DuplicateTracker] = None,
+    on_scraped: Optional[ScrapeCallback] = None,
+    on_summary_delta: Optional[SummaryDeltaCallback] = None,
+) -> ArticleData:
     scraped = await scrape_with_retries(url)
     if not scraped:
         return ArticleData(url=url, title="", content="", error="Failed to scrape")
+    if on_scraped is not None:
+        on_scraped(url, scraped)
+    return await summarize_scraped(url, scraped, summary_mode, duplicates, on_summary_delta)
+
+async def summarize_scraped(
+    url: str,
+    scraped: Dict,
+    summary_mode: Optional[str] = None,
+    duplicates: Optional[DuplicateTracker] = None,
+    on_summary_delta: Optional[SummaryDeltaCallback] = None,
+) -> ArticleData:
+    if duplicates is not None:
+        original = await duplicates.claim(url, scraped['text'])
+        if original is not None:
+            summary = await original
+            if summary:
+                logger.info("♊ Near-duplicate content, reusing summary: %s", url)
+                return ArticleData.from_text(url, scraped.get('title', 'No title'), scraped['text'], summary=summary)
 
+    summary = None
     try:
-        summary = await summarize_article(scraped.get('title', ''), scraped['text'])
-        return ArticleData(
-            url=url,
-            title=scraped.get('title', 'No title'),
-            content=scraped['text'],
-            summary=summary
+        on_partial = partial(on_summary_delta, url) if on_summary_delta is not None else None
+        summary = await summarize_article(scraped.get('title', ''), scraped['text'], summary_mode, on_partial)
+        return ArticleData.from_text(
+            url,
+            scraped.get('title', 'No title'),
+            scraped['text'],
+            summary=summary,
+            error=None if summary else "Failed to summarize"
         )
     except Exception as e:
-        return ArticleData(
-            url=url,
-            title=scraped.get('title', 'No title'),
-            content=scraped['text'],
-            error=str(e)
+        return ArticleData.from_text(url, scraped.get('title', 'No title'), scraped['text'], error=str(e))
+    finally:
+        if duplicates is not None:
+            duplicates.resolve(url, summary)
+
+async def process_articles_concurrently(
+    urls: List[str],
+    max_concurrency: Optional[int] = None,
+    summary_mode: Optional[str] = None,
+    on_scraped: Optional[ScrapeCallback] = None,
+    on_summary_delta: Optional[SummaryDeltaCallback] = None,
+) -> AsyncGenerator[ArticleData, None]:
+    """Process URLs in parallel and yield each article as soon as it finishes"""
+    local_limit = asyncio.Semaphore(max_concurrency or MAX_CONCURRENT_ARTICLES)
+    duplicates = DuplicateTracker()
+
+    async def worker(url: str) -> ArticleData:
+        async with local_limit, article_limiter:
+            try:
+                return await process_article(url, summary_mode, duplicates, on_scraped, on_summary_delta)
+            except Exception as e:
+                return ArticleData(url=url, title="", content="", error=str(e))
+
+    tasks = [asyncio.create_task(worker(url)) for url in urls]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def process_articles_batched(
+    urls: List[str],
+    max_concurrency: Optional[int] = None,
+    on_scraped: Optional[ScrapeCallback] = None,
+) -> AsyncGenerator[ArticleData, None]:
+    """Scrape in parallel, then summarize the scraped articles in packed batches.
+
+    Scrape failures and cached summaries are yielded straight away; the rest
+    are yielded batch by batch as each summarization request returns.
+    Near-duplicates of an earlier article are left out of the batches and
+    reuse that article's summary.
+    """
+    local_limit = asyncio.Semaphore(max_concurrency or MAX_CONCURRENT_ARTICLES)
+
+    async def scrape(url: str):
+        async with local_limit, article_limiter:
+            return url, await scrape_with_retries(url)
+
+    async def summarize(batch: List[BatchArticle]):
+        async with local_limit, article_limiter, stage_limiter("summarize"):
+            with span("summarize", mode="batch", articles=len(batch)):
+                return batch, await summarize_batch(batch)
+
+    pending: List[BatchArticle] = []
+    index = NearDuplicateIndex(NEAR_DUPLICATE_MAX_DISTANCE)
+    known_summaries: Dict[str, str] = {}
+    copies: Dict[str, List[BatchArticle]] = {}
+    scrape_tasks = [asyncio.create_task(scrape(url)) for url in urls]
+    summary_tasks = []
+    try:
+        for next_done in asyncio.as_completed(scrape_tasks):
+            url, scraped = await next_done
+            if not scraped:
+                yield ArticleData(url=url, title="", content="", error="Failed to scrape")
+                continue
+            if on_scraped is not None:
+                on_scraped(url, scraped)
+            article = BatchArticle(url=url, title=scraped.get('title', 'No title'), content=scraped['text'])
+            original = index.find_or_add(url, await asyncio.to_thread(simhash, article.content))
+            if original in known_summaries:
+                logger.info("♊ Near-duplicate content, reusing summary: %s", url)
+                yield ArticleData.from_text(
+                    article.url, article.title, article.content, summary=known_summaries[original]
+                )
+                continue
+            if original is not None:
+                copies.setdefault(original, []).append(article)
+                continue
+            cached = cached_summary(scraped.get('title', ''), article.content)
+            if cached is not None:
+                known_summaries[url] = cached
+                yield ArticleData.from_text(article.url, article.title, article.content, summary=cached)
+                continue
+            pending.append(article)
+
+        batches = plan_batches(pending)
+        logger.info("📦 Summarizing %d articles in %d request(s)", len(pending), len(batches))
+        summary_tasks = [asyncio.create_task(summarize(batch)) for batch in batches]
+        for next_done in asyncio.as_completed(summary_tasks):
+            batch, result = await next_done
+            log_usage("batch", result.usage)
+            for article in batch:
+                summary = result.summaries.get(article.url)
+                remember_summary(article.title, article.content, summary)
+                for copy in [article] + copies.get(article.url, []):
+                    yield ArticleData.from_text(
+                        copy.url,
+                        copy.title,
+                        copy.content,
+                        summary=summary,
+                        error=None if summary else "Failed to summarize"
+                    )
+    finally:
+        for task in scrape_tasks + summary_tasks:
+            task.cancel()
+
+async def process_articles_hedged(
+    candidates: List[str],
+    target: int,
+    deadline_at: float,
+    max_concurrency: Optional[int] = None,
+    summary_mode: Optional[str] = None,
+    on_scraped: Optional[ScrapeCallback] = None,
+    on_summary_delta: Optional[SummaryDeltaCallback] = None,
+) -> AsyncGenerator[ArticleData, None]:
+    """Over-fetch candidates, keep the first ``target`` that scrape, stop at the deadline.
+
+    Every candidate starts scraping at once (per-host limits still apply); as
+    soon as ``target`` of them succeed the remaining scrapes are cancelled.
+    When ``deadline_at`` (loop time) passes, everything still running is
+    cancelled and articles that were scraped but not summarized yet are
+    yielded with their content and an error, so callers always get the best
+    partial result. Scrape failures aren't yielded: hedges replace them.
+    """
+    loop = asyncio.get_running_loop()
+    local_limit = asyncio.Semaphore(max_concurrency or MAX_CONCURRENT_ARTICLES)
+    duplicates = DuplicateTracker()
+
+    async def scrape(url: str):
+        return url, await scrape_with_retries(url)
+
+    async def summarize(url: str, scraped: Dict) -> ArticleData:
+        async with local_limit, article_limiter:
+            return await summarize_scraped(url, scraped, summary_mode, duplicates, on_summary_delta)
+
+    scrape_tasks = {asyncio.create_task(scrape(url)) for url in candidates}
+    summary_tasks: Dict[asyncio.Task, tuple] = {}
+    accepted = 0
+    try:
+        while scrape_tasks or summary_tasks:
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                break
+            done, _ = await asyncio.wait(
+                scrape_tasks | set(summary_tasks),
+                timeout=remaining,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task in summary_tasks:
+                    summary_tasks.pop(task)
+                    yield task.result()
+                    continue
+
+                scrape_tasks.discard(task)
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                url, scraped = task.result()
+                if not scraped or accepted >= target:
+                    continue
+                accepted += 1
+                if on_scraped is not None:
+                    on_scraped(url, scraped)
+                summary_tasks[asyncio.create_task(summarize(url, scraped))] = (url, scraped)
+                if accepted >= target and scrape_tasks:
+                    logger.info("✂️ Got %d articles, cancelling %d slower scrapes", target, len(scrape_tasks))
+                    for straggler in scrape_tasks:
+                        straggler.cancel()
+                    scrape_tasks = set()
+
+        if summary_tasks:
+            logger.info("⏰ Deadline reached with %d summaries still running", len(summary_tasks))
+        for url, scraped in summary_tasks.values():
+            yield ArticleData.from_text(
+                url, scraped.get('title', 'No title'), scraped['text'], error="Summary not ready before the deadline"
+            )
+    finally:
+        for task in list(scrape_tasks) + list(summary_tasks):
+            task.cancel()
+
+async def run_research_events(
+    user_query: str,
+    concurrent: bool = True,
+    max_concurrency: Optional[int] = None,
+    summary_mode: Optional[str] = None,
+    max_articles: int = DEFAULT_MAX_ARTICLES,
+    deadline_seconds: Optional[float] = None,
+    stream_summaries: bool = False,
+    use_cache: bool = True,
+) -> AsyncGenerator[ResearchEvent, None]:
+    """Run the pipeline and yield one small event per step.
+
+    Each event carries only what is new since the previous one; counters are
+    kept incrementally instead of being recomputed from the article list.
+
+    With ``deadline_seconds`` the run is deadline-driven: more candidates than
+    ``max_articles`` are scraped speculatively, the first ``max_articles``
+    that succeed are kept, and whatever is done when the budget runs out is
+    returned.
+
+    With ``stream_summaries`` each direct-mode summary is also emitted as
+    ``SummaryDelta`` events while the model writes it, ahead of the article's
+    ``ArticleSummarized``. Batch and agent modes don't stream.
+
+    Finished runs are kept in the result cache. With ``use_cache`` a topic
+    close enough to a cached one is answered from it straight away (status
+    ``Completed (cached)``); a less close one reuses its search queries and
+    skips query generation. Either way ``QueriesGenerated.reused_from``
+    names the earlier topic.
+
+    The run is traced as one ``research`` span; ``Completed`` reports its
+    duration and the summed time of every stage span beneath it.
+    """
+    # Not made current: a context variable set here couldn't be reset across
+    # the yields below. Stages name it as their parent explicitly instead.
+    root = Span("research", attributes={"query": user_query})
+    try:
+        async for event in _research_events(
+            root, user_query, concurrent, max_concurrency, summary_mode, max_articles, deadline_seconds,
+            stream_summaries, use_cache
+        ):
+            yield event
+    finally:
+        root.end("cancelled")
+
+async def _research_events(
+    root: Span,
+    user_query: str,
+    concurrent: bool,
+    max_concurrency: Optional[int],
+    summary_mode: Optional[str],
+    max_articles: int,
+    deadline_seconds: Optional[float],
+    stream_summaries: bool,
+    use_cache: bool,
+) -> AsyncGenerator[ResearchEvent, None]:
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline_seconds if deadline_seconds else None
+
+    def time_left() -> Optional[float]:
+        return None if deadline_at is None else max(0.0, deadline_at - loop.time())
+
+    def finish(status: str, successful: int = 0, failed: int = 0, total: int = 0) -> Completed:
+        root.end("ok" if status.startswith("Completed") else "error")
+        RUNS.inc(status=status)
+        return Completed(
+            status=status,
+            successful=successful,
+            failed=failed,
+            total=total,
+            duration_seconds=root.duration,
+            stage_seconds=root.stage_seconds()
         )
 
-async def run_research_pipeline(user_query: str) -> AsyncGenerator[ResearchOutput, None]:
-    start_time = datetime.now()
+    cached = None
+    if use_cache and result_cache is not None:
+        with span("result_cache", parent=root) as current:
+            cached = result_cache.lookup(user_query, max_articles, RESULT_CACHE_VARIANT)
+            if cached is not None:
+                current.set(similarity=cached.similarity, serve=cached.serve)
 
-    print("\n🔍 Step 1: Generating search queries...")
-    query_response = await Runner.run(query_agent, input=user_query)
-    queries = query_response.final_output.queries
-    thought = query_response.final_output.thought
-
-    print("\n🧠 Agent Thought:")
-    print(thought)
-
-    yield ResearchOutput(
-        query=user_query,
-        articles=[],
-        status="Generated search queries",
-        total_articles=0,
-        successful_articles=0,
-        failed_articles=0,
-        duration_seconds=(datetime.now() - start_time).total_seconds(),
-        thought=thought,
-        queries=queries
-    )
+    if cached is not None and cached.serve:
+        logger.info("♻️ Serving earlier research on %r (similarity %.2f)", cached.topic, cached.similarity)
+        output = ResearchOutput.model_validate(cached.output)
+        yield QueriesGenerated(queries=output.queries or [], thought=output.thought, reused_from=cached.topic)
+        # Summaries first, in case the earlier run covered more articles than asked for now.
+        articles = sorted(output.articles, key=lambda article: article.error is not None)[:max_articles]
+        yield SearchDone(urls=[article.url for article in articles])
+        total = len(articles)
+        successful = failed = 0
+        for article in articles:
+            if article.error:
+                failed += 1
+                yield ArticleFailed(article=article, successful=successful, failed=failed, total=total)
+            else:
+                successful += 1
+                yield ArticleSummarized(article=article, successful=successful, failed=failed, total=total)
+        yield finish("Completed (cached)", successful, failed, total)
+        return
+
+    reused_from = None
+    if cached is not None and cached.output.get("queries"):
+        logger.info("♻️ Reusing search queries for %r (similarity %.2f)", cached.topic, cached.similarity)
+        queries = cached.output["queries"]
+        thought = cached.output.get("thought")
+        reused_from = cached.topic
+    else:
+        from agents import Runner
 
-    all_urls = []
-    print("\n🌐 Step 2: Performing web search...")
+        logger.info("🔍 Step 1: Generating search queries...")
+        try:
+            with span("query_generation", parent=root):
+                query_response = await asyncio.wait_for(
+                    Runner.run(get_query_agent(), input=user_query), time_left()
+                )
+        except asyncio.TimeoutError:
+            yield finish("Failed: deadline exceeded")
+            return
+        usage = SummaryUsage.from_result(query_response)
+        record_llm_usage("query_generation", QUERY_MODEL, usage.input_tokens, usage.output_tokens, usage.requests)
+        queries = query_response.final_output.queries
+        thought = query_response.final_output.thought
+
+    logger.info("🧠 Agent Thought: %s", thought)
+
+    yield QueriesGenerated(queries=queries, thought=thought, reused_from=reused_from)
+
+    logger.info("🌐 Step 2: Performing web search...")
     for q in queries:
-        print(f"Query: {q}")  # Print queries for logging
+        logger.info("Query: %s", q)
+    try:
+        with span("web_search", parent=root, queries=len(queries)):
+            search_results = await asyncio.wait_for(search_many(queries), time_left())
+    except asyncio.TimeoutError:
+        yield finish("Failed: deadline exceeded")
+        return
+    for q, error in search_results["errors"].items():
+        logger.warning("⚠️ Error during search for '%s': %s", q, error)
+
+    # Scrape the most promising hits first, judged by title and snippet.
+    ranked, dropped = rank_items(user_query, search_results["items"])
+    for url, reason in dropped.items():
+        logger.info("🚫 Skipping %s: %s", url, reason)
+    all_urls = [item["link"] for item in ranked]
+
+    unique_urls = dedupe_urls(all_urls)
+    if len(unique_urls) < len(all_urls):
+        logger.info("🧹 Dropped %d duplicate URLs", len(all_urls) - len(unique_urls))
+    if deadline_at is not None:
+        # Hedge: scrape extra candidates so slow or broken sites can be dropped.
+        wanted = max_articles + math.ceil(max_articles * HEDGE_RATIO)
+    else:
+        wanted = max_articles
+    urls_to_process = unique_urls[:wanted]
+    if PREFLIGHT_ENABLED and urls_to_process:
         try:
-            result = await search_web(q)
-            if result and "items" in result:
-                urls = [item["link"] for item in result["items"]]
-                all_urls.extend(urls)
-        except Exception as e:
-            print(f"⚠️ Error during search for '{q}': {e}")
-
-    if not all_urls:
-        yield ResearchOutput(
+            with span("preflight", parent=root, urls=min(len(unique_urls), wanted * 2)):
+                urls_to_process, failed_checks = await asyncio.wait_for(
+                    preflight(unique_urls, wanted), time_left()
+                )
+        except asyncio.TimeoutError:
+            failed_checks = {}
+        for url, reason in failed_checks.items():
+            logger.info("🚫 Skipping %s: %s", url, reason)
+        dropped.update(failed_checks)
+
+    yield SearchDone(urls=urls_to_process, errors=search_results["errors"], dropped=dropped)
+    if not urls_to_process:
+        yield finish("Failed: No URLs found")
+        return
+
+    logger.info("📰 Step 3: Processing %d URLs...", len(urls_to_process))
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_scraped(url: str, scraped: Dict) -> None:
+        events.put_nowait(ArticleScraped(
+            url=url,
+            title=scraped.get('title', 'No title'),
+            method=scraped.get('method'),
+            content_length=len(scraped['text'])
+        ))
+
+    def on_summary_delta(url: str, delta: str) -> None:
+        events.put_nowait(SummaryDelta(url=url, delta=delta))
+
+    summary_mode = summary_mode or SUMMARIZER_MODE
+    on_delta = on_summary_delta if stream_summaries else None
+    if deadline_at is not None:
+        article_stream = process_articles_hedged(
+            urls_to_process, max_articles, deadline_at, max_concurrency, summary_mode, on_scraped, on_delta
+        )
+    elif concurrent and summary_mode == "batch":
+        article_stream = process_articles_batched(urls_to_process, max_concurrency, on_scraped)
+    elif concurrent:
+        article_stream = process_articles_concurrently(
+            urls_to_process, max_concurrency, summary_mode, on_scraped, on_delta
+        )
+    else:
+        duplicates = DuplicateTracker()
+        article_stream = (
+            await process_article(url, summary_mode, duplicates, on_scraped, on_delta)
+            for url in urls_to_process
+        )
+
+    async def drive() -> None:
+        # The driver task owns its context, so the span can be current here
+        # and every scrape/summarize task it starts is traced beneath it.
+        try:
+            with span("articles", parent=root, urls=len(urls_to_process)):
+                async for article in article_stream:
+                    events.put_nowait(article)
+        finally:
+            events.put_nowait(None)
+
+    total = min(max_articles, len(urls_to_process))
+    successful = failed = 0
+    articles: List[ArticleData] = []
+    driver = asyncio.create_task(drive())
+    try:
+        while (item := await events.get()) is not None:
+            if not isinstance(item, ArticleData):
+                yield item
+                continue
+            articles.append(item)
+            if item.error:
+                failed += 1
+                yield ArticleFailed(article=item, successful=successful, failed=failed, total=total)
+            else:
+                successful += 1
+                yield ArticleSummarized(article=item, successful=successful, failed=failed, total=total)
+        await driver
+    finally:
+        driver.cancel()
+
+    status = "Completed" if deadline_at is None or loop.time() < deadline_at else "Completed (deadline reached)"
+    completed = finish(status, successful, failed, total)
+    if (
+        status == "Completed"
+        and successful
+        and not any(article.error == "Failed to summarize" for article in articles)
+        and result_cache is not None
+    ):
+        # Runs cut short by a deadline, or with summaries lost to a model
+        # outage, aren't a complete answer to reuse. Pages that couldn't be
+        # scraped would fail again, so those runs are kept.
+        result_cache.put(user_query, max_articles, RESULT_CACHE_VARIANT, ResearchOutput(
             query=user_query,
-            articles=[],
-            status="Failed: No URLs found",
-            total_articles=0,
-            successful_articles=0,
-            failed_articles=0,
-            duration_seconds=(datetime.now() - start_time).total_seconds(),
+            articles=articles,
+            status=status,
+            total_articles=total,
+            successful_articles=successful,
+            failed_articles=failed,
+            duration_seconds=completed.duration_seconds,
             thought=thought,
-            queries=queries
-        )
-        return
+            queries=queries,
+            stage_seconds=completed.stage_seconds
+        ).model_dump())
+    yield completed
 
-    print(f"\n📰 Step 3: Processing {min(5, len(all_urls))} URLs...")
-    urls_to_process = all_urls[:5]
-    processed_articles = []
+async def run_research_pipeline(
+    user_query: str,
+    concurrent: bool = True,
+    max_concurrency: Optional[int] = None,
+    summary_mode: Optional[str] = None,
+    max_articles: int = DEFAULT_MAX_ARTICLES,
+    deadline_seconds: Optional[float] = None,
+) -> AsyncGenerator[ResearchOutput, None]:
+    """Snapshot view of run_research_events: a full ResearchOutput per step.
 
-    for i, url in enumerate(urls_to_process):
-        article = await process_article(url)
-        processed_articles.append(article)
+    The final snapshot's duration and stage timings come from the run's trace.
+    """
+    start_time = datetime.now()
+    thought = None
+    queries = None
+    total = 0
+    processed_articles: List[ArticleData] = []
 
-        yield ResearchOutput(
+    def snapshot(
+        status: str,
+        successful: int = 0,
+        failed: int = 0,
+        completed: Optional[Completed] = None,
+    ) -> ResearchOutput:
+        return ResearchOutput(
             query=user_query,
             articles=processed_articles,
-            status=f"Processed {i+1}/{len(urls_to_process)}",
-            total_articles=len(urls_to_process),
-            successful_articles=sum(1 for a in processed_articles if not a.error),
-            failed_articles=sum(1 for a in processed_articles if a.error),
-            duration_seconds=(datetime.now() - start_time).total_seconds(),
+            status=status,
+            total_articles=total,
+            successful_articles=successful,
+            failed_articles=failed,
+            duration_seconds=(
+                completed.duration_seconds if completed else (datetime.now() - start_time).total_seconds()
+            ),
             thought=thought,
-            queries=queries
+            queries=queries,
+            stage_seconds=completed.stage_seconds if completed else None
         )
 
-    yield ResearchOutput(
-        query=user_query,
-        articles=processed_articles,
-        status="Completed",
-        total_articles=len(urls_to_process),
-        successful_articles=sum(1 for a in processed_articles if not a.error),
-        failed_articles=sum(1 for a in processed_articles if a.error),
-        duration_seconds=(datetime.now() - start_time).total_seconds(),
-        thought=thought,
-        queries=queries
-    )
+    async for event in run_research_events(
+        user_query, concurrent, max_concurrency, summary_mode, max_articles, deadline_seconds
+    ):
+        if isinstance(event, QueriesGenerated):
+            thought, queries = event.thought, event.queries
+            yield snapshot("Generated search queries")
+        elif isinstance(event, SearchDone):
+            total = min(max_articles, len(event.urls))
+        elif isinstance(event, (ArticleSummarized, ArticleFailed)):
+            processed_articles.append(event.article)
+            yield snapshot(f"Processed {len(processed_articles)}/{total}", event.successful, event.failed)
+        elif isinstance(event, Completed):
+            yield snapshot(event.status, event.successful, event.failed, event)
 
 
 
@@ -177,6 +866,8 @@ async def stream_output(output: ResearchOutput):
             print("\n---")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    maybe_start_metrics_server()
     user_input = input("\n🔎 Enter your research topic: ")
 
     async def main():
@@ -0,0 +1,212 @@
+"""Standalone HTTP service for the research pipeline, streaming Server-Sent Events.
+
+    GET  /research?topic=...&max_articles=5&mode=direct&deadline=30&stream=1&cache=1
+    POST /research   {"topic": ..., "max_articles": ..., "mode": ..., "deadline": ..., "stream": true, "cache": true}
+    GET  /healthz
+    GET  /metrics    Prometheus text format
+
+Each pipeline event (see ``main.ResearchEvent``) is sent as one SSE message
+whose ``event:`` is the event type and whose ``data:`` is the event as JSON. With ``stream`` set, direct-mode
+summaries also arrive piece by piece as ``summary_delta`` events while the
+model writes them. Topics close to an earlier finished one are answered
+from the result cache unless ``cache`` is turned off.
+Requests for the same normalized topic and options that arrive while a run
+is in flight, or up to SERVICE_REPLAY_SECONDS after it finished, join that
+run: they get every event from the start and then follow it live. Inside the
+pipeline, concurrent scrapes of one URL and summaries of one text are shared
+the same way, across all runs.
+
+    python research_service.py --port 8080
+    curl -N 'http://localhost:8080/research?topic=solid+state+batteries'
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+from typing import AsyncIterator, Optional
+
+from aiohttp import web
+
+from main import DEFAULT_MAX_ARTICLES, SUMMARIZER_MODE, run_research_events, scrape_flight, summary_flight
+from tools.concurrency import stage_stats
+from tools.extraction import extraction_pool
+from tools.search_tool import normalize_query
+from tools.singleflight import StreamFlight
+from tools.telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+# Finished runs are replayed to identical requests for this long.
+SERVICE_REPLAY_SECONDS = float(os.getenv("SERVICE_REPLAY_SECONDS", "30"))
+
+# An SSE comment is sent this often while waiting, so proxies keep the
+# connection open through slow stages.
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+SUMMARY_MODES = ("direct", "batch", "agent")
+
+research_flight = StreamFlight("research", linger_seconds=SERVICE_REPLAY_SECONDS)
+
+
+def sse_message(event_type: str, data: str) -> bytes:
+    lines = "".join(f"data: {line}\n" for line in data.splitlines() or [""])
+    return f"event: {event_type}\n{lines}\n".encode("utf-8")
+
+
+async def research_messages(
+    topic: str,
+    max_articles: int,
+    mode: str,
+    deadline: Optional[float],
+    stream: bool = False,
+    use_cache: bool = True,
+) -> AsyncIterator[bytes]:
+    """One pipeline run as encoded SSE messages, serialized once for every subscriber"""
+    try:
+        async for event in run_research_events(
+            topic, summary_mode=mode, max_articles=max_articles, deadline_seconds=deadline,
+            stream_summaries=stream, use_cache=use_cache
+        ):
+            yield sse_message(event.type, event.model_dump_json())
+    except Exception as e:
+        logger.exception("❌ Research run failed for %r", topic)
+        yield sse_message("error", json.dumps({"type": "error", "message": str(e)}))
+
+
+def parse_request(params: dict) -> tuple:
+    topic = str(params.get("topic") or params.get("query") or "").strip()
+    if not topic:
+        raise web.HTTPBadRequest(text="topic is required")
+    try:
+        max_articles = int(params.get("max_articles") or DEFAULT_MAX_ARTICLES)
+        deadline = float(params["deadline"]) if params.get("deadline") else None
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(text="max_articles and deadline must be numbers")
+    if not 1 <= max_articles <= 20:
+        raise web.HTTPBadRequest(text="max_articles must be between 1 and 20")
+    mode = str(params.get("mode") or SUMMARIZER_MODE)
+    if mode not in SUMMARY_MODES:
+        raise web.HTTPBadRequest(text=f"mode must be one of {', '.join(SUMMARY_MODES)}")
+    stream = str(params.get("stream", "")).lower() in ("1", "true", "yes")
+    use_cache = str(params.get("cache", "1")).lower() not in ("0", "false", "no")
+    return topic, max_articles, mode, deadline, stream, use_cache
+
+
+async def research(request: web.Request) -> web.StreamResponse:
+    if request.method == "POST":
+        try:
+            params = await request.json()
+        except json.JSONDecodeError:
+            raise web.HTTPBadRequest(text="body must be JSON")
+        if not isinstance(params, dict):
+            raise web.HTTPBadRequest(text="body must be a JSON object")
+    else:
+        params = dict(request.query)
+    topic, max_articles, mode, deadline, stream, use_cache = parse_request(params)
+
+    key = (normalize_query(topic), max_articles, mode, deadline, stream, use_cache)
+    messages = research_flight.subscribe(
+        key, lambda: research_messages(topic, max_articles, mode, deadline, stream, use_cache)
+    )
+
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    await response.prepare(request)
+    pending: Optional[asyncio.Task] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(messages.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=SSE_HEARTBEAT_SECONDS)
+            if not done:
+                await response.write(b": keep-alive\n\n")
+                continue
+            try:
+                message = pending.result()
+            except StopAsyncIteration:
+                break
+            pending = None
+            await response.write(message)
+    except (ConnectionResetError, asyncio.CancelledError) as e:
+        # The client went away; the shared run carries on for everyone else.
+        logger.info("🔌 Client disconnected from %r", topic)
+        if isinstance(e, asyncio.CancelledError):
+            raise
+        return response
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        await messages.aclose()
+    await response.write_eof()
+    return response
+
+
+async def healthz(request: web.Request) -> web.Response:
+    return web.json_response({
+        "status": "ok",
+        "research_runs": research_flight.running(),
+        "scrapes_in_flight": scrape_flight.in_flight(),
+        "summaries_in_flight": summary_flight.in_flight(),
+        "stages": stage_stats(),
+    })
+
+
+async def metrics(request: web.Request) -> web.Response:
+    return web.Response(
+        text=registry.render_prometheus(),
+        content_type="text/plain",
+        headers={"X-Content-Type-Options": "nosniff"},
+    )
+
+
+async def warm_up(app: web.Application) -> None:
+    """Import the lazily loaded SDKs and parsers before serving.
+
+    The pipeline imports them on first use, which would otherwise stall the
+    event loop (and every open stream) during the first request. The
+    extraction workers are started here for the same reason.
+    """
+    for module in ("agents", "newspaper", "bs4", "numpy"):
+        importlib.import_module(module)
+    extraction_pool.start()
+
+
+async def close_clients(app: web.Application) -> None:
+    from tools.search_tool import default_client
+    from tools.scrapper_tool import page_session
+
+    research_flight.close()
+    await default_client.close()
+    await page_session.close()
+    extraction_pool.shutdown()
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/research", research)
+    app.router.add_post("/research", research)
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/metrics", metrics)
+    app.on_startup.append(warm_up)
+    app.on_cleanup.append(close_clients)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    # There is no authentication, so only loopback unless a public bind is asked for.
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8080")))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+
+from tools.concurrency import ConcurrencyLimiter
+
+
+def test_waiter_on_another_loop_is_woken_by_release():
+    limiter = ConcurrencyLimiter(1)
+    held = threading.Event()
+    release = threading.Event()
+
+    async def hold():
+        await limiter.acquire()
+        held.set()
+        await asyncio.to_thread(release.wait)
+        limiter.release()
+
+    holder = threading.Thread(target=asyncio.run, args=(hold(),))
+    holder.start()
+    held.wait()
+
+    async def wait_for_slot():
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        release.set()
+        await asyncio.wait_for(waiter, 5)
+        assert limiter.active == 1
+        limiter.release()
+
+    asyncio.run(wait_for_slot())
+    holder.join()
+    assert limiter.active == 0
+
+
+def test_cancelled_waiter_on_another_loop_gives_up_its_place():
+    limiter = ConcurrencyLimiter(1)
+
+    async def cancel_while_waiting():
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    async def main():
+        await limiter.acquire()
+        await asyncio.to_thread(asyncio.run, cancel_while_waiting())
+        assert limiter.waiting == 0
+        limiter.release()
+
+    asyncio.run(main())
+    assert limiter.active == 0
+
+
+def test_slot_handed_to_a_cancelled_waiter_is_released():
+    limiter = ConcurrencyLimiter(1)
+    asyncio.run(limiter.acquire())  # held by a loop that has since gone
+
+    async def cancel_during_hand_off():
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()  # schedules the hand-off to ``waiter``
+        waiter.cancel()  # ...which is cancelled before it runs
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(cancel_during_hand_off())
+    assert (limiter.active, limiter.waiting) == (0, 0)
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from tools import fetch_scheduler as module
+from tools.fetch_scheduler import CircuitOpenError, FetchScheduler
+from tools.scrapper_tool import FetchError, FetchedPage
+
+URL = "https://example.com/page"
+
+
+class FakeFetch:
+    def __init__(self, fail: bool = True):
+        self.fail = fail
+        self.calls = 0
+        self.gate = None  # set to an asyncio.Event to hold requests open
+
+    async def __call__(self, url, headers=None):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            raise FetchError("server error", status=503)
+        return FetchedPage(url=url, final_url=url, status=200, content=b"ok")
+
+
+@pytest.fixture
+def fake_fetch(monkeypatch):
+    fake = FakeFetch()
+    monkeypatch.setattr(module, "fetch_page", fake)
+    return fake
+
+
+def test_zero_retries_still_makes_one_attempt(fake_fetch):
+    scheduler = FetchScheduler(retries=3, base_delay=0)
+    with pytest.raises(FetchError):
+        asyncio.run(scheduler.fetch(URL, retries=0))
+    assert fake_fetch.calls == 1
+    assert scheduler.retry_count == 0
+
+
+def test_open_breaker_fails_fast(fake_fetch):
+    scheduler = FetchScheduler(retries=1, failure_threshold=2, cooldown=60)
+    for _ in range(2):
+        with pytest.raises(FetchError):
+            asyncio.run(scheduler.fetch(URL))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(scheduler.fetch(URL))
+    assert fake_fetch.calls == 2
+    assert scheduler.stats()["open_circuits"] == 1
+
+
+def test_half_open_breaker_lets_one_probe_through(fake_fetch):
+    scheduler = FetchScheduler(retries=1, failure_threshold=1, cooldown=0.01)
+    with pytest.raises(FetchError):
+        asyncio.run(scheduler.fetch(URL))
+
+    async def probe_while_others_wait():
+        await asyncio.sleep(0.02)  # cooldown over
+        fake_fetch.fail = False
+        fake_fetch.gate = asyncio.Event()
+        probe = asyncio.ensure_future(scheduler.fetch(URL))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await scheduler.fetch(URL)
+        fake_fetch.gate.set()
+        await probe
+        await scheduler.fetch(URL)  # closed again
+
+    asyncio.run(probe_while_others_wait())
+    assert fake_fetch.calls == 3
+    assert scheduler.stats()["open_circuits"] == 0
+
+
+def test_failed_probe_reopens_the_breaker(fake_fetch):
+    scheduler = FetchScheduler(retries=1, failure_threshold=1, cooldown=0.01)
+
+    async def main():
+        with pytest.raises(FetchError):
+            await scheduler.fetch(URL)
+        await asyncio.sleep(0.02)
+        with pytest.raises(FetchError):
+            await scheduler.fetch(URL)  # the probe
+        with pytest.raises(CircuitOpenError):
+            await scheduler.fetch(URL)
+
+    asyncio.run(main())
+    assert fake_fetch.calls == 2
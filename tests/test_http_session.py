@@ -0,0 +1,46 @@
+import asyncio
+
+from tools.http_session import SessionPool
+
+
+def test_session_is_reused_within_a_loop():
+    pool = SessionPool()
+
+    async def main():
+        first = await pool.get()
+        assert await pool.get() is first
+        await pool.close()
+        assert first.closed
+        assert await pool.get() is not first
+        await pool.close()
+
+    asyncio.run(main())
+
+
+def test_each_loop_gets_its_own_session():
+    pool = SessionPool()
+
+    async def session_of_this_loop():
+        session = await pool.get()
+        other = await asyncio.to_thread(asyncio.run, pool.get())
+        assert other is not session
+        assert not session.closed
+        await other.close()
+        await pool.close()
+
+    asyncio.run(session_of_this_loop())
+
+
+def test_sessions_of_closed_loops_are_dropped():
+    pool = SessionPool()
+    loop = asyncio.new_event_loop()
+    old = loop.run_until_complete(pool.get())
+    loop.run_until_complete(old.close())
+    loop.close()
+
+    async def main():
+        session = await pool.get()
+        assert list(pool._sessions.values()) == [session]
+        await pool.close()
+
+    asyncio.run(main())
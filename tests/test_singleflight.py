@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from tools.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(3)))
+        assert results == ["done"] * 3
+        assert flight.in_flight() == 0
+
+    asyncio.run(main())
+    assert len(calls) == 1
+
+
+def test_work_outlives_one_cancelled_caller():
+    flight = SingleFlight("test")
+
+    async def main():
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        release.set()
+        assert await second == "done"
+
+    asyncio.run(main())
+
+
+def test_work_is_cancelled_when_every_caller_is():
+    flight = SingleFlight("test")
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(10)
+        finished.append(1)
+
+    async def main():
+        callers = [asyncio.ensure_future(flight.do("key", slow)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        assert flight.in_flight() == 0
+
+        async def fast():
+            return "fresh"
+
+        assert await flight.do("key", fast) == "fresh"
+
+    asyncio.run(main())
+    assert not finished
@@ -0,0 +1,35 @@
+import json
+
+from custom_agents.summarizer_agent import PartialJsonString
+
+
+def feed_all(chunks, field="summary"):
+    decoder = PartialJsonString(field)
+    return "".join(decoder.feed(chunk) for chunk in chunks), decoder
+
+
+def test_field_text_is_streamed_as_it_arrives():
+    decoder = PartialJsonString("summary")
+    assert decoder.feed('{"title": "x", "summ') == ""
+    assert decoder.feed('ary": "Hello') == "Hello"
+    assert decoder.feed(' world"') == " world"
+    assert decoder.done
+    assert decoder.feed(', "other": "ignored"}') == ""
+
+
+def test_escapes_split_across_chunks_are_held_back():
+    text = 'line one\nsaid "hi" \\ café \U0001F600 done'
+    raw = json.dumps({"summary": text})
+    # Every split point, including inside \n, é and the surrogate pair.
+    for split in range(len(raw)):
+        decoded, decoder = feed_all([raw[:split], raw[split:]])
+        assert decoded == text
+        assert decoder.done
+
+
+def test_one_character_at_a_time():
+    text = "tab\there — \U0001F680"
+    raw = json.dumps({"title": "t", "summary": text})
+    decoded, decoder = feed_all(list(raw))
+    assert decoded == text
+    assert decoder.done
@@ -1,4 +1,21 @@
-from .scrapper_tool import smart_scrape_url
-from .search_tool import search_web
+from importlib import import_module
 
-__all__ = ['smart_scrape_url', 'search_web']
+# Submodules are only imported when one of their names is first used, so
+# e.g. importing tools.cache doesn't drag in newspaper3k and BeautifulSoup.
+_EXPORTS = {
+    'smart_scrape_url': '.scrapper_tool',
+    'scrape_url': '.scrapper_tool',
+    'fetch_page': '.scrapper_tool',
+    'extract_article': '.scrapper_tool',
+    'FetchError': '.scrapper_tool',
+    'search_web': '.search_tool',
+    'search_many': '.search_tool',
+    'SearchClient': '.search_tool',
+}
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = list(_EXPORTS)
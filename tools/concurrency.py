@@ -0,0 +1,157 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+# Process-wide caps per pipeline stage, shared by every research run in the
+# process (Streamlit sessions, batch workers, service requests).
+STAGE_LIMITS = {
+    "search": int(os.getenv("SEARCH_CONCURRENCY", "8")),
+    "fetch": int(os.getenv("FETCH_CONCURRENCY", "32")),
+    "extract": int(os.getenv("EXTRACT_CONCURRENCY", str(os.cpu_count() or 4))),
+    "summarize": int(os.getenv("SUMMARIZE_CONCURRENCY", "16")),
+    "llm": int(os.getenv("LLM_CONCURRENCY", "8")),
+}
+
+
+class ConcurrencyLimiter:
+    """Process-wide concurrency limit that works across event loops.
+
+    Streamlit runs every session in its own thread with its own event loop, so a
+    plain ``asyncio.Semaphore`` can't be shared between users. This limiter keeps
+    its counter behind a thread lock and wakes waiters on whichever loop they
+    are parked on.
+    """
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self._active = 0
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            fut = loop.create_future()
+            waiter = (loop, fut)
+            self._waiters.append(waiter)
+
+        try:
+            await fut
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was already handed to us; pass it on. If the future was
+            # cancelled before the hand-off ran, _grant releases it instead.
+            if not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                loop, fut = self._waiters.popleft()
+                if fut.done() or loop.is_closed():
+                    continue
+                # Hand the slot over directly; _active stays the same.
+                loop.call_soon_threadsafe(self._grant, fut)
+                return
+            self._active -= 1
+
+    def _grant(self, fut: asyncio.Future) -> None:
+        if fut.done():
+            self.release()
+        else:
+            fut.set_result(None)
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+class RateLimiter:
+    """Token bucket shared across threads and event loops.
+
+    ``acquire`` reserves the next token and sleeps until it is due, so callers
+    are served in arrival order and bursts of up to ``burst`` go straight
+    through. A cancelled waiter keeps its reservation.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second must be positive")
+        self.rate = rate_per_second
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_stage_limiters: Dict[str, ConcurrencyLimiter] = {}
+_stage_lock = threading.Lock()
+
+
+def stage_limiter(stage: str) -> ConcurrencyLimiter:
+    """The process-wide limiter for a pipeline stage (see STAGE_LIMITS)"""
+    with _stage_lock:
+        limiter = _stage_limiters.get(stage)
+        if limiter is None:
+            limiter = _stage_limiters[stage] = ConcurrencyLimiter(STAGE_LIMITS[stage])
+        return limiter
+
+
+def stage_stats() -> Dict[str, Dict[str, int]]:
+    with _stage_lock:
+        limiters = dict(_stage_limiters)
+    return {
+        stage: {"limit": limiter.limit, "active": limiter.active, "waiting": limiter.waiting}
+        for stage, limiter in limiters.items()
+    }
+
+
+def rate_limiter_from_env(name: str) -> Optional[RateLimiter]:
+    """RateLimiter from ``<name>_PER_MINUTE`` (and optional ``<name>_BURST``); None if unset or 0"""
+    per_minute = float(os.getenv(f"{name}_PER_MINUTE", "0"))
+    if per_minute <= 0:
+        return None
+    return RateLimiter(per_minute / 60, int(os.getenv(f"{name}_BURST", "1")))
@@ -0,0 +1,57 @@
+import os
+import hashlib
+from typing import Optional
+from .cache import SQLiteCache, cache_path
+
+# Characters of article text kept in memory (and in every ResearchOutput);
+# the full text lives in the content store. A negative value keeps it all.
+ARTICLE_PREVIEW_CHARS = int(os.getenv("ARTICLE_PREVIEW_CHARS", "1000"))
+
+CONTENT_STORE_TTL = float(os.getenv("CONTENT_STORE_TTL", str(7 * 24 * 3600)))
+CONTENT_STORE_MAX_ENTRIES = int(os.getenv("CONTENT_STORE_MAX_ENTRIES", "20000"))
+
+
+class ContentStore:
+    """Full article texts on disk, addressed by the SHA-256 of the text.
+
+    Identical texts share one entry. Entries expire after the TTL or are
+    evicted least-recently-read first, after which ``load`` returns ``None``
+    and callers fall back to the preview they still hold.
+    """
+
+    def __init__(self, store: SQLiteCache):
+        self.store = store
+
+    @staticmethod
+    def content_id(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def save(self, text: str) -> str:
+        content_id = self.content_id(text)
+        self.store.set(content_id, text)
+        return content_id
+
+    def load(self, content_id: str) -> Optional[str]:
+        return self.store.get(content_id)
+
+    def stats(self):
+        return self.store.stats()
+
+
+def preview(text: str, limit: int = ARTICLE_PREVIEW_CHARS) -> str:
+    """The first ``limit`` characters of ``text``, cut back to a word boundary"""
+    if limit < 0 or len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > limit // 2 else cut).rstrip() + "…"
+
+
+content_store = ContentStore(
+    SQLiteCache(
+        cache_path("content.sqlite3"),
+        table="article_content",
+        ttl_seconds=CONTENT_STORE_TTL,
+        max_entries=CONTENT_STORE_MAX_ENTRIES,
+    )
+)
@@ -0,0 +1,62 @@
+import re
+import hashlib
+from typing import Dict, List, Optional
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+SIMHASH_BITS = 64
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    words = WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def simhash(text: str, size: int = 3) -> int:
+    """64-bit SimHash over word shingles; similar texts differ in few bits"""
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles(text, size):
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """Remembers SimHash fingerprints and finds ones within max_distance bits.
+
+    Fingerprints are passed in rather than computed here so callers can hash
+    large texts off the event loop.
+    """
+
+    def __init__(self, max_distance: int = 4):
+        self.max_distance = max_distance
+        self._fingerprints: Dict[str, int] = {}
+
+    def match(self, fingerprint: int) -> Optional[str]:
+        for key, other in self._fingerprints.items():
+            if hamming_distance(fingerprint, other) <= self.max_distance:
+                return key
+        return None
+
+    def add(self, key: str, fingerprint: int) -> None:
+        self._fingerprints[key] = fingerprint
+
+    def find_or_add(self, key: str, fingerprint: int) -> Optional[str]:
+        """Return the key of an earlier near-duplicate, or register this one"""
+        match = self.match(fingerprint)
+        if match is None:
+            self._fingerprints[key] = fingerprint
+        return match
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
@@ -0,0 +1,31 @@
+import csv
+import json
+from typing import IO, Dict, Iterable, List, Optional
+
+
+def write_csv(rows: Iterable[Dict], f: IO[str], fieldnames: Optional[List[str]] = None) -> int:
+    """Write rows to ``f`` one at a time; columns default to the first row's keys.
+
+    ``rows`` is consumed lazily, so only one row is in memory at once.
+    Returns the number of rows written.
+    """
+    writer = None
+    count = 0
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(f, fieldnames=fieldnames or list(row), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow(row)
+        count += 1
+    if writer is None and fieldnames:
+        csv.DictWriter(f, fieldnames=fieldnames).writeheader()
+    return count
+
+
+def write_jsonl(rows: Iterable[Dict], f: IO[str]) -> int:
+    """Write one JSON object per line, consuming ``rows`` lazily"""
+    count = 0
+    for row in rows:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        count += 1
+    return count
@@ -0,0 +1,141 @@
+import os
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from .concurrency import STAGE_LIMITS, ConcurrencyLimiter, stage_limiter
+from .scrapper_tool import FetchedPage, extract_html, record_extraction
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# "process" parses pages in a pool of EXTRACT_CONCURRENCY worker processes so
+# newspaper3k/bs4 don't hold the event loop's GIL; "thread" keeps the old
+# in-process threads (cheaper to start, but limited to about one core).
+EXTRACT_EXECUTOR = os.getenv("EXTRACT_EXECUTOR", "process")
+
+# Downloaded pages allowed to wait for a free extractor. A fetch only starts
+# once its page has a place in this queue, so slow extraction slows fetching
+# instead of piling raw HTML up in memory.
+EXTRACT_QUEUE_SIZE = int(os.getenv("EXTRACT_QUEUE_SIZE", "32"))
+
+# After this many broken process pools in a row, extract in threads for the
+# rest of the process (e.g. workers that can't start in this environment).
+MAX_POOL_FAILURES = 3
+
+
+def _warm_worker() -> None:
+    # Pay the parser imports once per worker, not on its first page.
+    for module in ("newspaper", "bs4"):
+        importlib.import_module(module)
+
+
+def _start_method() -> str:
+    # Forking a process that already runs threads (event loops, Streamlit)
+    # can deadlock the child; start workers from a clean interpreter instead.
+    methods = multiprocessing.get_all_start_methods()
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+
+class ExtractionPool:
+    """Runs HTML extraction off the event loop, in worker processes or threads.
+
+    Raw page bytes go to the workers and only the small title/text result
+    comes back. The pool is shared by every research run in the process and
+    started on first use; if a worker process dies the pool is rebuilt and
+    the page is extracted in a thread instead. Pools that keep breaking make
+    it fall back to threads for good.
+    """
+
+    def __init__(
+        self,
+        workers: int = STAGE_LIMITS["extract"],
+        executor: str = EXTRACT_EXECUTOR,
+        queue_size: int = EXTRACT_QUEUE_SIZE,
+    ):
+        if executor not in ("process", "thread"):
+            raise ValueError(f"unknown extraction executor {executor!r}")
+        self.workers = max(1, workers)
+        self.kind = executor
+        self._executor: Optional[Executor] = None
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._queue = ConcurrencyLimiter(self.workers + max(0, queue_size))
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        self.workers,
+                        mp_context=multiprocessing.get_context(_start_method()),
+                        initializer=_warm_worker,
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="extract")
+            return self._executor
+
+    def start(self) -> None:
+        """Start the workers now and wait until they have loaded the parsers"""
+        executor = self._get_executor()
+        if isinstance(executor, ProcessPoolExecutor):
+            wait([executor.submit(_warm_worker) for _ in range(self.workers)])
+
+    @asynccontextmanager
+    async def queue_slot(self) -> AsyncIterator[None]:
+        """Hold a place in the fetch → extract queue for one page"""
+        await self._queue.acquire()
+        try:
+            yield
+        finally:
+            self._queue.release()
+
+    async def extract(self, page: FetchedPage) -> Dict:
+        """Extract title and text from a downloaded page"""
+        if page.extracted is not None:
+            # Already pulled out while the page was downloading.
+            with span("extract", url=page.final_url, executor="stream") as current:
+                return record_extraction(current, page.extracted)
+        loop = asyncio.get_running_loop()
+        async with stage_limiter("extract"):
+            with span("extract", url=page.final_url, executor=self.kind) as current:
+                executor = self._get_executor()
+                try:
+                    result = await loop.run_in_executor(
+                        executor, extract_html, page.final_url, page.content, page.encoding
+                    )
+                    self._failures = 0
+                except BrokenProcessPool:
+                    self._pool_broken(executor)
+                    result = await asyncio.to_thread(extract_html, page.final_url, page.content, page.encoding)
+                return record_extraction(current, result)
+
+    def _pool_broken(self, executor: Executor) -> None:
+        with self._lock:
+            if self._executor is not executor:
+                return  # another page already replaced this pool
+            self._executor = None
+            self._failures += 1
+            if self._failures >= MAX_POOL_FAILURES:
+                logger.warning("⚠️ Extraction workers keep dying; extracting in threads from now on")
+                self.kind = "thread"
+            else:
+                logger.warning("⚠️ Extraction worker died; restarting the pool")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reset(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        self._reset()
+
+
+extraction_pool = ExtractionPool()
@@ -0,0 +1,171 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from .concurrency import ConcurrencyLimiter, stage_limiter
+from .scrapper_tool import FetchError, FetchedPage, fetch_page
+from .telemetry import RETRIES
+
+logger = logging.getLogger(__name__)
+
+PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", "4"))
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "3"))
+BACKOFF_BASE_SECONDS = float(os.getenv("FETCH_BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("FETCH_BACKOFF_MAX_SECONDS", "20"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("FETCH_CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("FETCH_CIRCUIT_COOLDOWN_SECONDS", "120"))
+
+
+class CircuitOpenError(FetchError):
+    """Raised without touching the network while a host's breaker is open"""
+
+    def __init__(self, host: str, reopens_in: float):
+        super().__init__(f"circuit open for {host} ({reopens_in:.0f}s left)", retryable=False)
+        self.host = host
+
+
+class HostState:
+    def __init__(self, limit: int):
+        self.limiter = ConcurrencyLimiter(limit)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.probing = False  # half-open: one request is testing the host
+
+    def refusing(self, now: float) -> bool:
+        return self.open_until > now or self.probing
+
+
+class FetchScheduler:
+    """Process-wide fetch policy: per-host limits, backoff and circuit breakers.
+
+    * At most ``per_host_limit`` downloads run against one host at a time,
+      across every research run in the process.
+    * Retryable failures back off exponentially with full jitter; a server's
+      Retry-After is honoured (capped at ``max_delay``).
+    * After ``failure_threshold`` consecutive retryable failures a host's
+      breaker opens and requests to it fail fast for ``cooldown`` seconds.
+      The next request after that is a probe, and the breaker stays
+      half-open while it runs, refusing everything else: success closes
+      the breaker, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        per_host_limit: int = PER_HOST_LIMIT,
+        retries: int = FETCH_RETRIES,
+        base_delay: float = BACKOFF_BASE_SECONDS,
+        max_delay: float = BACKOFF_MAX_SECONDS,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        cooldown: float = CIRCUIT_COOLDOWN_SECONDS,
+    ):
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.retry_count = 0
+        self.short_circuited = 0
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return (urlsplit(url).hostname or "").lower()
+
+    def _state(self, host: str) -> HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = HostState(self.per_host_limit)
+            return state
+
+    def _check_circuit(self, host: str, state: HostState) -> bool:
+        """Raise if the host's breaker refuses the request; True if it goes through as the probe"""
+        with self._lock:
+            if not state.open_until:
+                return False
+            remaining = state.open_until - time.monotonic()
+            if remaining <= 0 and not state.probing:
+                state.probing = True
+                return True
+            self.short_circuited += 1
+        raise CircuitOpenError(host, max(0.0, remaining))
+
+    def _record_success(self, state: HostState) -> None:
+        with self._lock:
+            state.consecutive_failures = 0
+            state.open_until = 0.0
+            state.probing = False
+
+    def _record_failure(self, host: str, state: HostState) -> None:
+        with self._lock:
+            state.consecutive_failures += 1
+            state.probing = False
+            if state.consecutive_failures >= self.failure_threshold:
+                state.open_until = time.monotonic() + self.cooldown
+                logger.warning("🚧 Circuit opened for %s for %.0fs", host, self.cooldown)
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None, base_delay: Optional[float] = None) -> float:
+        base = self.base_delay if base_delay is None else base_delay
+        delay = random.uniform(0, min(self.max_delay, base * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    async def fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+    ) -> FetchedPage:
+        host = self.host_of(url)
+        state = self._state(host)
+        # ``retries`` counts attempts; 0 still makes the one attempt.
+        retries = max(1, self.retries if retries is None else retries)
+        for attempt in range(1, retries + 1):
+            probe = self._check_circuit(host, state)
+            try:
+                # Host slot first, so a busy host doesn't tie up global slots.
+                async with state.limiter, stage_limiter("fetch"):
+                    page = await fetch_page(url, headers=headers)
+                self._record_success(state)
+                return page
+            except FetchError as e:
+                if not e.retryable:
+                    raise
+                self._record_failure(host, state)
+                if attempt == retries:
+                    raise
+                delay = self.backoff_delay(attempt, e.retry_after, base_delay)
+                logger.warning("❌ Attempt %d failed for %s: %s; retrying in %.1fs", attempt, url, e, delay)
+                with self._lock:
+                    self.retry_count += 1
+                RETRIES.inc(stage="fetch")
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                if probe:
+                    with self._lock:
+                        # Cancelled, or failed in a way that says nothing
+                        # about the host: let the next request probe.
+                        state.probing = False
+        raise FetchError(f"no attempts made for {url}")
+
+    def stats(self) -> Dict[str, int]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "hosts": len(self._hosts),
+                "open_circuits": sum(1 for s in self._hosts.values() if s.refusing(now)),
+                "retries": self.retry_count,
+                "short_circuited": self.short_circuited,
+            }
+
+
+fetch_scheduler = FetchScheduler()
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class SessionPool:
+    """Lazily created, pooled keep-alive aiohttp session.
+
+    A ClientSession belongs to the event loop it was created on, so each
+    loop gets its own (e.g. the UI's background loop next to ``asyncio.run``
+    callers), and switching between them reuses rather than leaks sessions.
+    Sessions of loops that have since closed are dropped on the next ``get``
+    (a session references its loop, so they can't be weakly keyed).
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 20,
+        limit_per_host: int = 0,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 60.0,
+        timeout: float = 10.0,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.pool_size = pool_size
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.headers = headers or {}
+        self._sessions: "Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = {}
+        self._lock = threading.Lock()  # loops on other threads share the pool
+
+    async def get(self) -> "aiohttp.ClientSession":
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for other in [other for other in self._sessions if other.is_closed()]:
+                del self._sessions[other]
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    limit_per_host=self.limit_per_host,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                    keepalive_timeout=self.keepalive_timeout,
+                )
+                session = self._sessions[loop] = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                    headers=self.headers,
+                )
+        return session
+
+    async def close(self) -> None:
+        """Close the running loop's session; a session can only be closed on its own loop"""
+        with self._lock:
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
@@ -0,0 +1,178 @@
+import os
+import re
+import math
+import asyncio
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .concurrency import stage_limiter
+
+# How much each extra query returning the same hit, and a high position in
+# the search results, add to the title/snippet relevance (which is 0..1).
+RANK_AGREEMENT_WEIGHT = float(os.getenv("RANK_AGREEMENT_WEIGHT", "0.3"))
+RANK_POSITION_WEIGHT = float(os.getenv("RANK_POSITION_WEIGHT", "0.2"))
+
+# Hosts whose pages can't be scraped into article text (video, social,
+# hard paywalls). Subdomains match too; BLOCKED_DOMAINS adds more.
+DEFAULT_BLOCKED_DOMAINS = {
+    "youtube.com", "youtu.be", "vimeo.com", "tiktok.com", "instagram.com",
+    "facebook.com", "x.com", "twitter.com", "pinterest.com", "linkedin.com",
+    "wsj.com", "ft.com", "economist.com",
+}
+BLOCKED_DOMAINS = DEFAULT_BLOCKED_DOMAINS | {
+    domain.strip().lower() for domain in os.getenv("BLOCKED_DOMAINS", "").split(",") if domain.strip()
+}
+
+# Links to documents and media rather than HTML pages.
+BLOCKED_EXTENSIONS = {
+    ".pdf", ".doc", ".docx", ".ppt", ".pptx", ".xls", ".xlsx", ".csv", ".zip",
+    ".gz", ".tar", ".rar", ".exe", ".dmg", ".mp3", ".mp4", ".mov", ".avi",
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp",
+}
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Optional HEAD request per candidate before scraping, to drop non-HTML and
+# oversized responses. Servers that don't answer HEAD are given the benefit
+# of the doubt.
+PREFLIGHT_ENABLED = os.getenv("PREFLIGHT_ENABLED", "0") == "1"
+PREFLIGHT_TIMEOUT = float(os.getenv("PREFLIGHT_TIMEOUT", "3"))
+PREFLIGHT_MAX_BYTES = int(os.getenv("PREFLIGHT_MAX_BYTES", str(5 * 1024 * 1024)))
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in",
+    "is", "it", "of", "on", "or", "that", "the", "this", "to", "what", "when",
+    "which", "who", "why", "with",
+}
+
+
+def _stem(token: str) -> str:
+    # Plurals only: enough for "batteries" to match "battery".
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(token) for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def bm25_scores(query: List[str], documents: List[List[str]], k1: float = 1.2, b: float = 0.75) -> List[float]:
+    """Okapi BM25 score of each tokenized document for the tokenized query"""
+    if not documents:
+        return []
+    average_length = sum(len(doc) for doc in documents) / len(documents) or 1.0
+    document_frequency = Counter(term for doc in documents for term in set(doc))
+    scores = []
+    for doc in documents:
+        counts = Counter(doc)
+        score = 0.0
+        for term in set(query):
+            frequency = counts.get(term, 0)
+            if not frequency:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            score += idf * frequency * (k1 + 1) / (
+                frequency + k1 * (1 - b + b * len(doc) / average_length)
+            )
+        scores.append(score)
+    return scores
+
+
+def _blocked_domain(host: str) -> bool:
+    host = host.lower()
+    return any(host == domain or host.endswith("." + domain) for domain in BLOCKED_DOMAINS)
+
+
+def rejection_reason(item: Dict) -> Optional[str]:
+    """Why a search hit isn't worth scraping, or None if it is"""
+    parts = urlsplit(item["link"])
+    if _blocked_domain(parts.hostname or ""):
+        return "blocked domain"
+    if os.path.splitext(parts.path)[1].lower() in BLOCKED_EXTENSIONS:
+        return "not an HTML page"
+    mime = item.get("mime")
+    if mime and not mime.startswith(HTML_CONTENT_TYPES):
+        return f"content type {mime}"
+    return None
+
+
+def rank_items(query: str, items: List[Dict]) -> Tuple[List[Dict], Dict[str, str]]:
+    """Order search hits by how promising they are and drop hopeless ones.
+
+    Each hit is scored by BM25 of its title and snippet against ``query``
+    (normalized so the best hit scores 1), plus RANK_AGREEMENT_WEIGHT for
+    every additional generated query that returned it and up to
+    RANK_POSITION_WEIGHT for its best position in the results. Returns the
+    kept items, best first, each with a ``score``, and ``{link: reason}``
+    for the dropped ones.
+    """
+    kept: List[Dict] = []
+    dropped: Dict[str, str] = {}
+    for item in items:
+        reason = rejection_reason(item)
+        if reason:
+            dropped[item["link"]] = reason
+        else:
+            kept.append(item)
+
+    relevance = bm25_scores(
+        tokenize(query),
+        [tokenize(f"{item.get('title', '')} {item.get('snippet', '')}") for item in kept],
+    )
+    best = max(relevance, default=0.0) or 1.0
+    ranked = []
+    for item, score in zip(kept, relevance):
+        agreement = max(0, len(item.get("queries", [])) - 1)
+        position = item.get("rank", 0)
+        ranked.append({
+            **item,
+            "score": round(
+                score / best + RANK_AGREEMENT_WEIGHT * agreement + RANK_POSITION_WEIGHT / (1 + position), 4
+            ),
+        })
+    # The sort is stable, so ties keep the search engine's order.
+    ranked.sort(key=lambda item: item["score"], reverse=True)
+    return ranked, dropped
+
+
+async def _preflight(url: str) -> Optional[str]:
+    """HEAD one URL; returns a rejection reason or None"""
+    import aiohttp
+    from .scrapper_tool import page_session
+
+    session = await page_session.get()
+    try:
+        async with stage_limiter("fetch"):
+            async with session.head(
+                url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=PREFLIGHT_TIMEOUT)
+            ) as response:
+                if response.status in (404, 410):
+                    return f"HTTP {response.status}"
+                if response.status >= 400:
+                    return None  # many servers mishandle HEAD; let the real fetch decide
+                content_type = response.headers.get("Content-Type", "").lower()
+                if content_type and not content_type.startswith(HTML_CONTENT_TYPES):
+                    return f"content type {content_type.split(';')[0]}"
+                length = response.headers.get("Content-Length", "")
+                if length.isdigit() and int(length) > PREFLIGHT_MAX_BYTES:
+                    return f"too large ({int(length)} bytes)"
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+    return None
+
+
+async def preflight(urls: List[str], wanted: int) -> Tuple[List[str], Dict[str, str]]:
+    """Pick ``wanted`` of the ranked ``urls``, HEAD-checking twice that many first.
+
+    The checks run concurrently; URLs that pass keep their order, and if too
+    many fail the list is topped up with unchecked ones further down.
+    """
+    checked = urls[:wanted * 2]
+    reasons = await asyncio.gather(*(_preflight(url) for url in checked))
+    passed = [url for url, reason in zip(checked, reasons) if reason is None]
+    dropped = {url: reason for url, reason in zip(checked, reasons) if reason is not None}
+    return (passed + urls[len(checked):])[:wanted], dropped
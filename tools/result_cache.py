@@ -0,0 +1,245 @@
+import os
+import re
+import time
+import zlib
+import threading
+from typing import Any, Dict, FrozenSet, List, Optional
+from pydantic import BaseModel
+from .cache import SQLiteCache, cache_path, make_key
+from .ranking import tokenize
+from .search_tool import normalize_query
+from .telemetry import CACHE_REQUESTS
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", str(6 * 3600)))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000"))
+
+# Cosine similarity between topic vectors above which a finished run is
+# served as the answer, and the lower one above which only its generated
+# search queries are reused (the search, scrape and summary caches then make
+# the rest of the run cheap).
+RESULT_CACHE_SERVE_SIMILARITY = float(os.getenv("RESULT_CACHE_SERVE_SIMILARITY", "0.85"))
+RESULT_CACHE_REUSE_SIMILARITY = float(os.getenv("RESULT_CACHE_REUSE_SIMILARITY", "0.6"))
+
+# Size of the hashed feature space. Topics are a few words long, so
+# collisions are rare, and 1000 entries take 8 MB as float32.
+VECTOR_DIMS = 2048
+
+# Parts of a topic that change its meaning however similar the rest is:
+# numbers (years, versions), words with symbols ("c++", "c#"), quoted phrases
+# and ``-word`` exclusions.
+MARKER_RE = re.compile(r'"[^"]*"|(?<!\w)-\w+|\w*[+#]+|\d+')
+
+
+# Words that say what kind of answer is wanted rather than what it is about
+# ("latest X", "X breakthroughs"); left out of topic vectors.
+FILLER_WORDS = {
+    "latest", "recent", "new", "news", "current", "today", "update", "trend",
+    "advance", "advancement", "breakthrough", "development", "overview",
+    "introduction", "guide", "tutorial", "explained", "best", "top",
+}
+
+
+def topic_features(topic: str) -> List[str]:
+    """Words of the topic (stopwords dropped, plurals folded) plus their character 4-grams.
+
+    The n-grams let "quantum computers" and "quantum computing" overlap.
+    Numbers are compared on their own (see ResultCache) and filler words
+    are dropped, unless nothing else is left.
+    """
+    words = [word for word in tokenize(normalize_query(topic)) if not word.isdigit()]
+    words = [word for word in words if word not in FILLER_WORDS] or words
+    features = [f"w:{word}" for word in words]
+    for word in words:
+        padded = f" {word} "
+        features.extend(f"c:{padded[i:i + 4]}" for i in range(max(1, len(padded) - 3)))
+    return features
+
+
+def topic_markers(topic: str) -> FrozenSet[str]:
+    return frozenset(MARKER_RE.findall(normalize_query(topic)))
+
+
+class CachedResearch(BaseModel):
+    topic: str  # the earlier topic the output was produced for
+    similarity: float
+    serve: bool  # whole output can be served; otherwise reuse its queries only
+    output: Dict[str, Any]  # ResearchOutput.model_dump() of the earlier run
+
+
+class ResultCache:
+    """Finished research runs, looked up by similarity of their topics.
+
+    Each topic is turned into a hashed bag of words and character 4-grams,
+    weighted by TF-IDF over the cached topics. All vectors are kept in one
+    NumPy matrix, so a lookup is a single matrix-vector product. Outputs
+    stay in SQLite and only the best match is read back.
+
+    Entries only match runs of the same ``variant`` (models and prompt
+    version). A match is served when it is close enough, covered at least
+    as many articles as requested and its topic has the same markers
+    (numbers, "c++", quoted phrases, exclusions); otherwise a close enough
+    match still lends its search queries.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteCache,
+        serve_similarity: float = RESULT_CACHE_SERVE_SIMILARITY,
+        reuse_similarity: float = RESULT_CACHE_REUSE_SIMILARITY,
+        dims: int = VECTOR_DIMS,
+    ):
+        self.store = store
+        self.serve_similarity = serve_similarity
+        self.reuse_similarity = reuse_similarity
+        self.dims = dims
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._keys: List[str] = []
+        self._variants: List[str] = []
+        self._markers: List[FrozenSet[str]] = []
+        self._max_articles: List[int] = []
+        self._created: List[float] = []
+        self._rows: List[Any] = []  # log term-frequency vector per entry
+        self._matrix = None  # TF-IDF rows, L2-normalized; rebuilt lazily
+        self._idf = None
+
+    def _counts(self, topic: str):
+        import numpy as np
+
+        indices = [zlib.crc32(feature.encode("utf-8")) % self.dims for feature in topic_features(topic)]
+        counts = np.bincount(np.array(indices, dtype=np.int64), minlength=self.dims)
+        return np.log1p(counts.astype(np.float32))
+
+    def _load(self) -> None:
+        self._loaded = True
+        for key, created_at, topic, max_articles, variant in self.store.scan("topic", "max_articles", "variant"):
+            self._append(key, created_at, topic, max_articles, variant)
+
+    def _append(self, key: str, created_at: float, topic: str, max_articles: int, variant: str) -> None:
+        if key in self._keys:
+            self._drop(self._keys.index(key))
+        self._keys.append(key)
+        self._variants.append(variant)
+        self._markers.append(topic_markers(topic))
+        self._max_articles.append(max_articles)
+        self._created.append(created_at)
+        self._rows.append(self._counts(topic))
+        self._matrix = None
+
+    def _drop(self, index: int) -> None:
+        for column in (
+            self._keys, self._variants, self._markers, self._max_articles, self._created, self._rows
+        ):
+            del column[index]
+        self._matrix = None
+
+    def _weighted(self):
+        import numpy as np
+
+        if self._matrix is None:
+            counts = np.vstack(self._rows)
+            document_frequency = np.count_nonzero(counts, axis=0)
+            self._idf = (np.log((1 + len(self._rows)) / (1 + document_frequency)) + 1).astype(np.float32)
+            matrix = counts * self._idf
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = matrix / np.maximum(norms, 1e-12)
+        return self._matrix
+
+    def lookup(self, topic: str, max_articles: int, variant: str) -> Optional[CachedResearch]:
+        """The most similar fresh run worth reusing for ``topic``, if any"""
+        import numpy as np
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            while self._keys:
+                matrix = self._weighted()
+                query = self._counts(topic) * self._idf
+                norm = np.linalg.norm(query)
+                if not norm:
+                    break
+                similarity = matrix @ (query / norm)
+
+                oldest = time.time() - self.store.ttl_seconds if self.store.ttl_seconds is not None else 0.0
+                markers = topic_markers(topic)
+                usable = (np.array(self._created) >= oldest) & (np.array(self._variants) == variant)
+                servable = (
+                    usable
+                    & (np.array(self._max_articles) >= max_articles)
+                    & np.array([entry == markers for entry in self._markers])
+                )
+                candidates = np.where(servable & (similarity >= self.serve_similarity))[0]
+                serve = bool(len(candidates))
+                if not serve:
+                    candidates = np.where(usable & (similarity >= self.reuse_similarity))[0]
+                if not len(candidates):
+                    break
+
+                best = int(candidates[np.argmax(similarity[candidates])])
+                entry = self.store.get(self._keys[best])
+                if entry is None:
+                    # Expired or evicted from the store; forget it and look again.
+                    self._drop(best)
+                    continue
+                if serve:
+                    self.hits += 1
+                else:
+                    self.partial_hits += 1
+                CACHE_REQUESTS.inc(cache="result", result="hit" if serve else "partial")
+                return CachedResearch(
+                    topic=entry["topic"],
+                    similarity=round(float(similarity[best]), 4),
+                    serve=serve,
+                    output=entry["output"],
+                )
+            self.misses += 1
+        CACHE_REQUESTS.inc(cache="result", result="miss")
+        return None
+
+    def put(self, topic: str, max_articles: int, variant: str, output: Dict[str, Any]) -> None:
+        key = make_key("result", normalize_query(topic), max_articles, variant)
+        self.store.set(key, {"topic": topic, "max_articles": max_articles, "variant": variant, "output": output})
+        with self._lock:
+            if not self._loaded:
+                return  # the first lookup reads it back with everything else
+            if len(self._keys) >= self.store.max_entries:
+                # The store has just evicted its least recently used entry.
+                self._reset()
+                self._load()
+            else:
+                self._append(key, time.time(), topic, max_articles, variant)
+
+    def _reset(self) -> None:
+        self._loaded = False
+        for column in (
+            self._keys, self._variants, self._markers, self._max_articles, self._created, self._rows
+        ):
+            column.clear()
+        self._matrix = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "entries": len(self.store),
+            "evictions": self.store.evictions,
+        }
+
+
+result_cache = (
+    ResultCache(
+        SQLiteCache(
+            cache_path("results.sqlite3"),
+            table="research_results",
+            ttl_seconds=RESULT_CACHE_TTL,
+            max_entries=RESULT_CACHE_MAX_ENTRIES,
+        )
+    )
+    if RESULT_CACHE_ENABLED
+    else None
+)
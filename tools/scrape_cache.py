@@ -0,0 +1,110 @@
+import os
+import time
+import hashlib
+from typing import Dict, Optional, Tuple
+from .cache import SQLiteCache, cache_path
+from .telemetry import CACHE_REQUESTS
+from .urls import canonicalize_url
+
+SCRAPE_CACHE_ENABLED = os.getenv("SCRAPE_CACHE_ENABLED", "1") == "1"
+SCRAPE_CACHE_FRESH_SECONDS = float(os.getenv("SCRAPE_CACHE_FRESH_SECONDS", str(6 * 3600)))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "2000"))
+
+
+class ScrapeCache:
+    """Extraction results keyed by canonical URL, revalidated with conditional GETs.
+
+    Entries younger than ``fresh_seconds`` are served as-is. Older ones are
+    kept (until LRU eviction) so their ETag / Last-Modified can be sent back to
+    the server; a 304 reuses the stored extraction without parsing again.
+    """
+
+    def __init__(self, store: SQLiteCache, fresh_seconds: float = SCRAPE_CACHE_FRESH_SECONDS):
+        self.store = store
+        self.fresh_seconds = fresh_seconds
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.refetched = 0
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return canonicalize_url(url)
+
+    def _result(self, entry: Dict) -> Dict:
+        return {"title": entry["title"], "text": entry["text"], "method": entry["method"], "cached": True}
+
+    def lookup(self, url: str) -> Tuple[Optional[Dict], Dict[str, str]]:
+        """Return ``(fresh_result, conditional_headers)`` for a URL.
+
+        ``fresh_result`` is set when the entry can be served without asking
+        the server; otherwise the headers are what to send on the next GET.
+        """
+        entry = self.store.get(self._key(url))
+        if entry is None:
+            CACHE_REQUESTS.inc(cache="scrape", result="miss")
+            return None, {}
+        if time.time() - entry["fetched_at"] <= self.fresh_seconds:
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="scrape", result="hit")
+            return self._result(entry), {}
+        CACHE_REQUESTS.inc(cache="scrape", result="stale")
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return None, headers
+
+    def revalidated_result(self, url: str, headers: Dict[str, str]) -> Optional[Dict]:
+        """Handle a 304: refresh the entry's timestamp and return its extraction"""
+        key = self._key(url)
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        entry["fetched_at"] = time.time()
+        entry["etag"] = headers.get("etag", entry.get("etag"))
+        entry["last_modified"] = headers.get("last-modified", entry.get("last_modified"))
+        self.store.set(key, entry)
+        self.revalidated += 1
+        CACHE_REQUESTS.inc(cache="scrape", result="revalidated")
+        return self._result(entry)
+
+    def put(self, url: str, result: Dict, headers: Dict[str, str], refetched: bool = False) -> None:
+        if refetched:
+            self.refetched += 1
+        else:
+            self.misses += 1
+        self.store.set(self._key(url), {
+            "title": result.get("title", ""),
+            "text": result["text"],
+            "method": result.get("method", ""),
+            "content_hash": hashlib.sha256(result["text"].encode("utf-8")).hexdigest(),
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "fetched_at": time.time(),
+        })
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "refetched": self.refetched,
+            "entries": len(self.store),
+            "evictions": self.store.evictions,
+        }
+
+
+scrape_cache = (
+    ScrapeCache(
+        SQLiteCache(
+            cache_path("scrape.sqlite3"),
+            table="scraped_pages",
+            ttl_seconds=None,
+            max_entries=SCRAPE_CACHE_MAX_ENTRIES,
+        )
+    )
+    if SCRAPE_CACHE_ENABLED
+    else None
+)
@@ -1,38 +1,336 @@
 
-from newspaper import Article
-from bs4 import BeautifulSoup
-import requests
-from typing import Dict
+import os
+import time
+import asyncio
+import importlib.util
+import logging
+from datetime import datetime, timezone
+from email.message import Message
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Tuple
+from .http_session import SessionPool
+from .telemetry import BYTES_DOWNLOADED, EXTRACTIONS, TRUNCATED_PAGES, span
+
+logger = logging.getLogger(__name__)
+
+FETCH_TIMEOUT = 10
+MIN_TEXT_LENGTH = 100
+
+# Page downloads stop after MAX_PAGE_BYTES or FETCH_DEADLINE seconds, keeping
+# what has arrived; article text is nearly always in the first part of the
+# HTML, so a truncated page usually still extracts.
+MAX_PAGE_BYTES = int(os.getenv("MAX_PAGE_BYTES", str(1024 * 1024)))
+FETCH_DEADLINE = float(os.getenv("FETCH_DEADLINE", str(FETCH_TIMEOUT)))
+READ_CHUNK_BYTES = 64 * 1024
+
+# Once a download passes STREAM_EXTRACT_MIN_BYTES, paragraphs are pulled out
+# of it as they arrive; when STREAM_TEXT_TARGET characters are collected the
+# download stops and that text is the extraction. Smaller pages never reach
+# the target, so they aren't parsed here at all, only by the extraction pool.
+# A target of 0 turns it off. Needs lxml.
+STREAM_TEXT_TARGET = int(os.getenv("STREAM_TEXT_TARGET", "60000"))
+STREAM_EXTRACT_MIN_BYTES = int(os.getenv("STREAM_EXTRACT_MIN_BYTES", str(256 * 1024)))
+PARAGRAPH_MIN_CHARS = 40
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+# Statuses worth retrying; anything else >= 400 is treated as permanent.
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+page_session = SessionPool(
+    pool_size=50,
+    limit_per_host=4,
+    timeout=FETCH_TIMEOUT,
+    headers={"User-Agent": USER_AGENT},
+)
+
+
+class FetchError(Exception):
+    """Network-level failure while downloading a page"""
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        retryable: bool = True,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class FetchedPage(BaseModel):
+    url: str
+    final_url: str
+    status: int
+    content: bytes
+    encoding: Optional[str] = None
+    headers: Dict[str, str] = {}
+    truncated: Optional[str] = None  # why the download stopped early, if it did
+    extracted: Optional[Dict] = None  # article text already pulled out while streaming
+
+    def text(self) -> str:
+        return decode_html(self.content, self.encoding)
+
+
+def header_charset(content_type: Optional[str]) -> Optional[str]:
+    """The charset parameter of a Content-Type header, without any default"""
+    if not content_type:
+        return None
+    message = Message()
+    message["content-type"] = content_type
+    return message.get_content_charset()
+
+
+def decode_html(content: bytes, encoding: Optional[str] = None) -> str:
+    """Decode page bytes the way a browser would.
+
+    The header charset wins when there is one; otherwise a BOM, then the
+    page's own ``<meta charset>``, then a guess from the bytes decide.
+    """
+    from bs4.dammit import UnicodeDammit
+
+    dammit = UnicodeDammit(content, known_definite_encodings=[encoding] if encoding else [], is_html=True)
+    if dammit.unicode_markup is not None:
+        return dammit.unicode_markup
+    return content.decode(encoding or "utf-8", errors="replace")
+
+
+class StreamingTextExtractor:
+    """Pulls the title and paragraph text out of HTML fed to it chunk by chunk.
+
+    Built on lxml's incremental parser, so each piece is parsed in C and
+    finished paragraphs are released right away. Parsing runs on the
+    caller's thread, which for ``fetch_page`` is the event loop, so it is
+    kept small: nothing is parsed until ``min_bytes`` have been fed (pages
+    below that go to the extraction pool untouched), the held bytes are then
+    parsed in READ_CHUNK_BYTES pieces, and parsing stops as soon as
+    ``target_chars`` of paragraph text are in. ``feed`` returns True at that
+    point; the text is cut to ``target_chars``.
+    """
+
+    def __init__(
+        self,
+        target_chars: int = STREAM_TEXT_TARGET,
+        encoding: Optional[str] = None,
+        min_bytes: int = STREAM_EXTRACT_MIN_BYTES,
+    ):
+        self.target_chars = target_chars
+        self.encoding = encoding
+        self.min_bytes = min_bytes
+        self.title = ""
+        self.paragraphs: List[str] = []
+        self.chars = 0
+        self._held: List[bytes] = []  # chunks fed before the page reached min_bytes
+        self._held_bytes = 0
+        self._parser = None
+
+    @classmethod
+    def create(cls, encoding: Optional[str] = None) -> Optional["StreamingTextExtractor"]:
+        """An extractor, or None when streaming extraction is off or lxml is missing"""
+        if STREAM_TEXT_TARGET <= 0 or html_parser() != "lxml":
+            return None
+        return cls(encoding=encoding)
+
+    @property
+    def done(self) -> bool:
+        return self.chars >= self.target_chars
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.done:
+            return True
+        if self._parser is not None:
+            return self._parse(chunk)
+        self._held.append(chunk)
+        self._held_bytes += len(chunk)
+        if self._held_bytes < self.min_bytes:
+            return False
+        from lxml import etree
+
+        self._parser = etree.HTMLPullParser(events=("end",), tag=("title", "p"), encoding=self.encoding)
+        held, self._held = b"".join(self._held), []
+        for start in range(0, len(held), READ_CHUNK_BYTES):
+            if self._parse(held[start:start + READ_CHUNK_BYTES]):
+                return True
+        return False
+
+    def _parse(self, data: bytes) -> bool:
+        self._parser.feed(data)
+        for _, element in self._parser.read_events():
+            text = " ".join("".join(element.itertext()).split())
+            if element.tag == "title" and not self.title:
+                self.title = text
+            elif element.tag == "p" and len(text) > PARAGRAPH_MIN_CHARS and not self.done:
+                room = self.target_chars - self.chars
+                if len(text) > room:
+                    text = text[:room].rsplit(" ", 1)[0]
+                self.paragraphs.append(text)
+                self.chars += max(len(text), 1)
+            element.clear()
+        return self.done
+
+    def result(self) -> Dict:
+        return {"title": self.title or "No Title", "text": "\n".join(self.paragraphs)[:self.target_chars], "method": "stream"}
+
+
+async def _read_capped(
+    response,
+    max_bytes: int,
+    extractor: Optional[StreamingTextExtractor],
+) -> Tuple[bytes, Optional[str]]:
+    """Read a response body up to ``max_bytes``; returns (content, truncated reason)"""
+    import aiohttp
+
+    chunks: List[bytes] = []
+    size = 0
+    try:
+        async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+            chunk = chunk[:max_bytes - size]
+            chunks.append(chunk)
+            size += len(chunk)
+            if extractor is not None and extractor.feed(chunk):
+                return b"".join(chunks), "enough text"
+            if size >= max_bytes:
+                return b"".join(chunks), "size cap"
+    except (aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+        if not chunks:
+            raise
+        return b"".join(chunks), "deadline" if isinstance(e, asyncio.TimeoutError) else "connection closed"
+    return b"".join(chunks), None
+
+
+async def fetch_page(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    max_bytes: int = MAX_PAGE_BYTES,
+    deadline: float = FETCH_DEADLINE,
+) -> FetchedPage:
+    """Download a page once over the shared pooled session.
+
+    At most ``max_bytes`` are read and the whole request gets ``deadline``
+    seconds; either limit keeps the part already received instead of
+    failing. Pages with plenty of article text stop downloading as soon as
+    the streaming extractor has enough of it.
+    """
+    import aiohttp
+
+    session = await page_session.get()
+    with span("fetch", url=url) as current:
+        try:
+            async with session.get(
+                url, headers=headers, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=deadline)
+            ) as response:
+                current.set(status=response.status)
+                if response.status >= 400:
+                    raise FetchError(
+                        f"HTTP {response.status}",
+                        status=response.status,
+                        retryable=response.status in RETRYABLE_STATUSES,
+                        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                    )
+                extractor = StreamingTextExtractor.create(response.charset) if response.status == 200 else None
+                try:
+                    content, truncated = await _read_capped(response, max_bytes, extractor)
+                except asyncio.TimeoutError as e:
+                    # The server answered but sent no body in time; trying
+                    # again would only stall the run further.
+                    raise FetchError(f"no content within {deadline}s", retryable=False) from e
+                BYTES_DOWNLOADED.inc(len(content), source="page")
+                current.set(bytes=len(content))
+                if truncated:
+                    logger.info("✂️ Stopped downloading %s after %d bytes: %s", url, len(content), truncated)
+                    TRUNCATED_PAGES.inc(reason=truncated)
+                    current.set(truncated=truncated)
+                return FetchedPage(
+                    url=url,
+                    final_url=str(response.url),
+                    status=response.status,
+                    content=content,
+                    encoding=response.charset,
+                    headers={k.lower(): v for k, v in response.headers.items()},
+                    truncated=truncated,
+                    extracted=extractor.result() if truncated == "enough text" else None,
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise FetchError(f"{type(e).__name__}: {e}") from e
+
+
+def extract_article(url: str, html: str) -> Dict:
+    """Extract title and text from already-downloaded HTML"""
+    with span("extract", url=url) as current:
+        return record_extraction(current, _extract_article(url, html))
+
+
+def record_extraction(current, result: Dict) -> Dict:
+    """Tag the extract span and count the result by extraction method"""
+    method = result.get("method", "failed")
+    current.set(method=method)
+    EXTRACTIONS.inc(method=method)
+    return result
+
+
+def extract_html(url: str, content: bytes, encoding: Optional[str] = None) -> Dict:
+    """Decode and extract raw page bytes; safe to run in a worker process"""
+    return _extract_article(url, decode_html(content, encoding))
+
+
+@lru_cache(maxsize=None)
+def html_parser() -> str:
+    """BeautifulSoup tree builder: lxml's C parser when installed, else the pure-Python one"""
+    return "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+
+def _extract_article(url: str, html: str) -> Dict:
+    # Heavy parsers are imported on first use to keep startup fast.
+    from newspaper import Article
+    from bs4 import BeautifulSoup
 
-def smart_scrape_url(url: str) -> Dict:
-    """Scrape logic with better error handling"""
-    print(f"🔎 Scraping: {url}")
-    
     # --- First attempt: newspaper3k ---
     try:
         article = Article(url)
-        article.download()
+        article.download(input_html=html)
         article.parse()
-        if article.text and len(article.text) > 100:
+        if article.text and len(article.text) > MIN_TEXT_LENGTH:
             return {
                 "title": article.title or "No Title",
                 "text": article.text,
                 "method": "newspaper3k"
             }
     except Exception as e:
-        print(f"❌ newspaper3k failed for {url}:", str(e))
+        logger.warning("❌ newspaper3k failed for %s: %s", url, e)
 
-    # --- Fallback: BeautifulSoup ---
+    # --- Fallback: BeautifulSoup on the same HTML ---
     try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.content, "html.parser")
+        soup = BeautifulSoup(html, html_parser())
         title = soup.title.get_text(strip=True) if soup.title else "No Title"
         text = "\n".join(p.get_text(strip=True) for p in soup.find_all("p") if len(p.get_text(strip=True)) > 40)
-        
-        if not text or len(text) < 100:
-            print(f"⚠️ Scraped content too short: {url}")
+
+        if not text or len(text) < MIN_TEXT_LENGTH:
+            logger.warning("⚠️ Scraped content too short: %s", url)
             return {"error": "Content too short"}
-        
+
         return {
             "title": title,
             "text": text,
@@ -40,5 +338,39 @@ def smart_scrape_url(url: str) -> Dict:
         }
 
     except Exception as e:
-        print(f"❌ bs4 scraping failed for {url}:", str(e))
+        logger.warning("❌ bs4 scraping failed for %s: %s", url, e)
+        return {"error": f"Scraping failed: {e}"}
+
+
+async def scrape_url(url: str) -> Dict:
+    """Fetch once asynchronously, then extract off the event loop"""
+    logger.info("🔎 Scraping: %s", url)
+    page = await fetch_page(url)
+    return await asyncio.to_thread(lambda: extract_article(page.final_url, page.text()))
+
+
+def smart_scrape_url(url: str) -> Dict:
+    """Blocking scrape for sync callers: one download, then extraction"""
+    import requests
+
+    logger.info("🔎 Scraping: %s", url)
+    try:
+        with requests.get(url, timeout=FETCH_TIMEOUT, headers={"User-Agent": USER_AGENT}, stream=True) as response:
+            response.raise_for_status()
+            # Same caps as fetch_page: stop at MAX_PAGE_BYTES or FETCH_DEADLINE.
+            stop_at = time.monotonic() + FETCH_DEADLINE
+            chunks: List[bytes] = []
+            size = 0
+            for chunk in response.iter_content(READ_CHUNK_BYTES):
+                chunks.append(chunk[:MAX_PAGE_BYTES - size])
+                size += len(chunks[-1])
+                if size >= MAX_PAGE_BYTES or time.monotonic() > stop_at:
+                    break
+            content = b"".join(chunks)
+            # Not response.encoding: requests assumes ISO-8859-1 for any
+            # text/html without a charset, hiding the page's <meta charset>.
+            encoding = header_charset(response.headers.get("Content-Type"))
+    except Exception as e:
+        logger.warning("❌ Download failed for %s: %s", url, e)
         return {"error": f"Scraping failed: {e}"}
+    return extract_article(response.url, decode_html(content, encoding))
@@ -47,24 +47,154 @@
 
 # tools/search_tool.py
 import os
-import aiohttp
+import json
+import asyncio
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
+from .cache import SQLiteCache, cache_path, make_key
+from .concurrency import stage_limiter
+from .http_session import SessionPool
+from .urls import dedup_key
+from .telemetry import BYTES_DOWNLOADED, CACHE_REQUESTS, span
 
 load_dotenv()
 
 API_KEY = os.getenv("WEBSEARCH_API_KEY_2")
 CX_ID = os.getenv("CX_ID_2")
+SEARCH_URL = os.getenv("CUSTOM_SEARCH_URL", "https://www.googleapis.com/customsearch/v1")
+
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "1") == "1"
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so near-repeats share a key.
+
+    Punctuation is kept: "C++" and "C#", quoted phrases and ``-word``
+    exclusions all change what a search returns.
+    """
+    return " ".join(query.lower().split())
+
+
+class SearchClient:
+    """Custom Search client that keeps one pooled, keep-alive aiohttp session"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = API_KEY,
+        cx_id: Optional[str] = CX_ID,
+        num: int = 5,
+        pool_size: int = 20,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 60.0,
+        timeout: float = 10.0,
+        cache: Optional[SQLiteCache] = None,
+    ):
+        self.api_key = api_key
+        self.cx_id = cx_id
+        self.num = num
+        self.cache = cache
+        self._pool = SessionPool(
+            pool_size=pool_size,
+            dns_cache_ttl=dns_cache_ttl,
+            keepalive_timeout=keepalive_timeout,
+            timeout=timeout,
+        )
+
+    def _params(self, query: str, num: Optional[int]) -> Dict:
+        return {
+            "key": self.api_key,
+            "cx": self.cx_id,
+            "q": query,
+            "num": num or self.num,
+        }
+
+    def _cache_key(self, query: str, num: Optional[int]) -> str:
+        return make_key("search", self.cx_id, normalize_query(query), num or self.num)
+
+    async def search(self, query: str, num: Optional[int] = None) -> dict:
+        if self.cache is not None:
+            cached = self.cache.get(self._cache_key(query, num))
+            CACHE_REQUESTS.inc(cache="search", result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+
+        async with stage_limiter("search"):
+            with span("search", query=query) as current:
+                session = await self._pool.get()
+                async with session.get(SEARCH_URL, params=self._params(query, num)) as response:
+                    body = await response.read()
+                    BYTES_DOWNLOADED.inc(len(body), source="search")
+                    current.set(status=response.status, bytes=len(body))
+                    if response.status != 200:
+                        return {"items": [], "error": body.decode("utf-8", errors="replace")}
+                    result = json.loads(body)
+
+        if self.cache is not None:
+            self.cache.set(self._cache_key(query, num), result)
+        return result
+
+    async def search_many(self, queries: List[str], num: Optional[int] = None) -> dict:
+        """Run all queries at once and merge their items, first occurrence wins.
+
+        Hits are merged on their canonical link (tracking parameters and AMP
+        variants removed), keeping the first link as returned for fetching.
+        Each merged item gets a ``queries`` list naming every query that
+        returned it and its best 0-based ``rank`` in any of their results.
+        Per-query failures are collected under ``errors``.
+        """
+        results = await asyncio.gather(
+            *(self.search(q, num) for q in queries), return_exceptions=True
+        )
+
+        merged: Dict[str, dict] = {}
+        errors: Dict[str, str] = {}
+        for query, result in zip(queries, results):
+            if isinstance(result, BaseException):
+                errors[query] = str(result)
+                continue
+            if result.get("error"):
+                errors[query] = str(result["error"])
+            for position, item in enumerate(result.get("items", [])):
+                link = item.get("link")
+                if not link:
+                    continue
+                key = dedup_key(link)
+                if key not in merged:
+                    merged[key] = {**item, "link": link, "queries": [], "rank": position}
+                merged[key]["queries"].append(query)
+                merged[key]["rank"] = min(merged[key]["rank"], position)
+
+        return {"items": list(merged.values()), "errors": errors}
+
+    async def close(self) -> None:
+        await self._pool.close()
+
+    async def __aenter__(self) -> "SearchClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+
+search_cache = (
+    SQLiteCache(
+        cache_path("search.sqlite3"),
+        table="search_results",
+        ttl_seconds=SEARCH_CACHE_TTL,
+        max_entries=SEARCH_CACHE_MAX_ENTRIES,
+    )
+    if SEARCH_CACHE_ENABLED
+    else None
+)
+
+default_client = SearchClient(cache=search_cache)
+
 
 async def search_web(query: str) -> dict:
-    params = {
-        "key": API_KEY,
-        "cx": CX_ID,
-        "q": query,
-        "num": 5
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://www.googleapis.com/customsearch/v1", params=params) as response:
-            if response.status != 200:
-                return {"items": [], "error": await response.text()}
-            return await response.json()
+    return await default_client.search(query)
+
+
+async def search_many(queries: List[str]) -> dict:
+    return await default_client.search_many(queries)
@@ -0,0 +1,166 @@
+import asyncio
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from .telemetry import registry
+
+COALESCED = registry.counter(
+    "research_singleflight_total",
+    "Calls that started work (leader) or joined work already in flight (shared)",
+    ("flight", "result"),
+)
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it is running await the same result (or exception).
+    Cancelling one caller doesn't cancel the shared work, but once every
+    caller has been cancelled nobody wants the result and the work is
+    cancelled too. Flights belong to the event loop they were started on.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Any, _Flight]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _in_flight(self) -> Dict[Any, _Flight]:
+        loop = asyncio.get_running_loop()
+        flights = self._flights.get(loop)
+        if flights is None:
+            flights = self._flights[loop] = {}
+        return flights
+
+    async def do(self, key: Any, work: Callable[[], Awaitable[Any]]) -> Any:
+        flights = self._in_flight()
+        flight = flights.get(key)
+        if flight is None:
+            COALESCED.inc(flight=self.name, result="leader")
+            flight = flights[key] = _Flight(asyncio.ensure_future(work()))
+
+            def finished(task: asyncio.Task) -> None:
+                if flights.get(key) is flight:
+                    del flights[key]
+                # Mark the exception retrieved even if every caller went away.
+                if not task.cancelled():
+                    task.exception()
+
+            flight.task.add_done_callback(finished)
+        else:
+            COALESCED.inc(flight=self.name, result="shared")
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # The last caller left; later callers start afresh.
+                if flights.get(key) is flight:
+                    del flights[key]
+                flight.task.cancel()
+
+    def in_flight(self) -> int:
+        return len(self._in_flight())
+
+
+class SharedStream:
+    """Consumes one async iterator and lets any number of subscribers follow it.
+
+    Every subscriber sees the full sequence from the first item: what was
+    produced before it joined is replayed, then it follows live.
+    """
+
+    def __init__(self, source: AsyncIterator[Any]):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.finished_at: Optional[float] = None
+        self._signal = asyncio.Event()
+        self._task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[Any]) -> None:
+        try:
+            async for item in source:
+                self.items.append(item)
+                self._wake()
+        except Exception as e:
+            self.error = e
+        finally:
+            if hasattr(source, "aclose"):
+                await source.aclose()
+            self.done = True
+            self.finished_at = asyncio.get_running_loop().time()
+            self._wake()
+
+    def _wake(self) -> None:
+        signal, self._signal = self._signal, asyncio.Event()
+        signal.set()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            while index < len(self.items):
+                yield self.items[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._signal.wait()
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+
+class StreamFlight:
+    """SingleFlight for streams: one producer per key, shared by every subscriber.
+
+    A finished stream keeps being replayed to new subscribers for
+    ``linger_seconds``, so a burst of identical requests that straddles the
+    end of a run still shares it.
+    """
+
+    def __init__(self, name: str, linger_seconds: float = 0.0):
+        self.name = name
+        self.linger_seconds = linger_seconds
+        self._streams: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Any, SharedStream]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _active(self) -> Dict[Any, SharedStream]:
+        loop = asyncio.get_running_loop()
+        streams = self._streams.get(loop)
+        if streams is None:
+            streams = self._streams[loop] = {}
+        now = loop.time()
+        for key, stream in list(streams.items()):
+            if stream.done and now - stream.finished_at > self.linger_seconds:
+                del streams[key]
+        return streams
+
+    def subscribe(self, key: Any, start: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Follow the stream for ``key``, calling ``start()`` to produce it if none is running"""
+        streams = self._active()
+        stream = streams.get(key)
+        if stream is None:
+            COALESCED.inc(flight=self.name, result="leader")
+            stream = streams[key] = SharedStream(start())
+        else:
+            COALESCED.inc(flight=self.name, result="shared")
+        return stream.subscribe()
+
+    def running(self) -> int:
+        return sum(1 for stream in self._active().values() if not stream.done)
+
+    def close(self) -> None:
+        """Cancel every stream on the current loop"""
+        for stream in self._active().values():
+            stream.cancel()
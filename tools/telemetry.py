@@ -0,0 +1,382 @@
+import os
+import json
+import queue
+import atexit
+import asyncio
+import time
+import uuid
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Finished spans are appended here as JSON lines when set.
+TRACE_FILE = os.getenv("TRACE_FILE")
+
+# Serve Prometheus metrics on this port (see maybe_start_metrics_server),
+# bound to loopback unless METRICS_HOST says otherwise.
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelKey, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value:g}"
+            for key, value in sorted(self.samples().items())
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, rendered the way Prometheus expects"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelKey, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> Dict[LabelKey, Dict[str, float]]:
+        with self._lock:
+            return {key: {"sum": entry[1], "count": entry[2]} for key, entry in self._values.items()}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()}
+        lines = []
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named counters and histograms; asking twice for a name returns the same metric"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """JSON-friendly view: counter values and histogram sums/counts per label set"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                ",".join(f"{n}={v}" for n, v in zip(metric.labelnames, key)): value
+                for key, value in metric.samples().items()
+            }
+            for metric in metrics
+        }
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "research_stage_duration_seconds", "Time spent in each pipeline stage", ("stage", "outcome")
+)
+BYTES_DOWNLOADED = registry.counter(
+    "research_bytes_downloaded_total", "Response bytes downloaded", ("source",)
+)
+LLM_REQUESTS = registry.counter(
+    "research_llm_requests_total", "Model requests made", ("stage", "model")
+)
+LLM_TOKENS = registry.counter(
+    "research_llm_tokens_total", "Model tokens used", ("stage", "model", "direction")
+)
+CACHE_REQUESTS = registry.counter(
+    "research_cache_requests_total", "Cache lookups by outcome", ("cache", "result")
+)
+RETRIES = registry.counter(
+    "research_retries_total", "Retried attempts", ("stage",)
+)
+EXTRACTIONS = registry.counter(
+    "research_extractions_total", "Article extractions by the method that produced the text", ("method",)
+)
+TRUNCATED_PAGES = registry.counter(
+    "research_pages_truncated_total", "Page downloads stopped early, by reason", ("reason",)
+)
+RUNS = registry.counter(
+    "research_runs_total", "Finished research runs by final status", ("status",)
+)
+
+
+def record_llm_usage(
+    stage: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    requests: int = 1,
+) -> None:
+    LLM_REQUESTS.inc(requests, stage=stage, model=model)
+    LLM_TOKENS.inc(input_tokens, stage=stage, model=model, direction="input")
+    LLM_TOKENS.inc(output_tokens, stage=stage, model=model, direction="output")
+
+
+class _TraceWriter:
+    """Appends finished spans to a JSON-lines file from a background thread.
+
+    ``write`` only queues the line, so spans ending on the event loop never
+    wait for the disk. Queued lines are flushed on ``close`` and at exit.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._lines: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if not self.path:
+            return
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        self._lines.put(line)
+
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            while (line := self._lines.get()) is not None:
+                f.write(line + "\n")
+                if self._lines.empty():
+                    f.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._lines.put(None)
+            thread.join(timeout=5)
+
+
+_trace_writer = _TraceWriter(TRACE_FILE)
+
+
+class Span:
+    """One timed unit of work.
+
+    The first span of a trace is its root; every descendant adds its duration
+    to the root's per-stage totals, which is what a research run reports as
+    its stage timings.
+    """
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.parent = parent
+        self.root = parent.root if parent is not None else self
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self._stages: Dict[str, float] = {}
+        self._stages_lock = threading.Lock() if parent is None else None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def elapsed(self) -> float:
+        return self.duration if self.duration is not None else time.perf_counter() - self._start
+
+    def _add_stage(self, name: str, seconds: float) -> None:
+        with self._stages_lock:
+            self._stages[name] = self._stages.get(name, 0.0) + seconds
+
+    def stage_seconds(self) -> Dict[str, float]:
+        """Summed durations of this trace's finished spans, by name (root only)"""
+        with self.root._stages_lock:
+            return {name: round(seconds, 4) for name, seconds in self.root._stages.items()}
+
+    def end(self, status: Optional[str] = None) -> None:
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._start
+        if status is not None:
+            self.status = status
+        STAGE_SECONDS.observe(self.duration, stage=self.name, outcome=self.status)
+        if self.root is not self:
+            self.root._add_stage(self.name, self.duration)
+        _trace_writer.write({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else None,
+            "name": self.name,
+            "start": self.started_at,
+            "duration": self.duration,
+            "status": self.status,
+            "attributes": self.attributes,
+        })
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, parent: Optional[Span] = None, **attributes: Any) -> Iterator[Span]:
+    """Time a block as a child of ``parent`` (default: the current span).
+
+    Tasks and threads started inside the block (``asyncio.create_task``,
+    ``asyncio.to_thread``) inherit it as their parent.
+    """
+    active = Span(name, parent or _current_span.get(), attributes)
+    token = _current_span.set(active)
+    status = "ok"
+    try:
+        yield active
+    except BaseException as e:
+        status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+        active.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        active.end(status)
+
+
+def maybe_start_metrics_server(port: Optional[str] = METRICS_PORT, host: str = METRICS_HOST):
+    """Serve ``/metrics`` on ``host`` from a daemon thread if a port is configured.
+
+    Returns the server, or ``None`` when metrics serving is off. Only one
+    server is started per process.
+    """
+    global _metrics_server
+    if not port or _metrics_server is not None:
+        return _metrics_server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    _metrics_server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    threading.Thread(target=_metrics_server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("📈 Serving Prometheus metrics on %s:%s/metrics", host, port)
+    return _metrics_server
+
+
+_metrics_server = None
@@ -0,0 +1,64 @@
+import re
+from typing import Iterable, List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only track where a click came from.
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid",
+    "yclid", "_ga", "_gl", "ref", "ref_src", "cmpid", "ocid", "sr_share",
+}
+TRACKING_PREFIXES = ("utm_",)
+AMP_PARAMS = {"amp", "outputtype"}
+AMP_PATH = re.compile(r"/amp/?$|\.amp(?=\.html?$)|/amp(?=/)", re.IGNORECASE)
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name in AMP_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings share one key.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and AMP markers, and sorts what is left of the query string.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("amp."):
+        host = host[len("amp."):]
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = AMP_PATH.sub("", parts.path) or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def dedup_key(url: str) -> str:
+    """Looser key for spotting the same page: ignores scheme, www. and trailing slash"""
+    parts = urlsplit(canonicalize_url(url))
+    host = parts.netloc[4:] if parts.netloc.startswith("www.") else parts.netloc
+    path = parts.path.rstrip("/") or "/"
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+
+
+def dedupe_urls(urls: Iterable[str]) -> List[str]:
+    """Drop repeats of the same page, keeping the first occurrence's order.
+
+    Pages are matched on ``dedup_key``, but the URLs are returned as given:
+    the canonical form is only a key and may not exist on the server.
+    """
+    seen = set()
+    unique = []
+    for url in urls:
+        key = dedup_key(url)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(url)
+    return unique
@@ -1,9 +1,32 @@
 import streamlit as st
 import asyncio
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import AsyncGenerator
-from main import run_research_pipeline, ResearchOutput, ArticleData
-import pandas as pd
+from typing import IO, AsyncGenerator, Dict, Iterator, List, Optional, TypeVar
+from main import (
+    run_research_events,
+    ArticleData,
+    QueriesGenerated,
+    ArticleScraped,
+    SummaryDelta,
+    ArticleSummarized,
+    ArticleFailed,
+    Completed,
+)
+from tools.export import write_csv, write_jsonl
+from tools.search_tool import normalize_query
+from tools.telemetry import maybe_start_metrics_server
+
+T = TypeVar("T")
+
+# Finished research kept app-wide so any session can re-open it instantly.
+# Articles only carry a content preview; the full text stays on disk.
+RESULT_CACHE_SIZE = 50
+
+EXPORT_FIELDS = ["url", "title", "summary", "error", "content"]
 
 # Configure page settings
 st.set_page_config(
@@ -99,92 +122,223 @@ def display_thought_process(thought: str):
         </div>
         """, unsafe_allow_html=True)
 
-def display_article_card(article: ArticleData, index: int):
-    """Display individual article card with summary and metadata"""
+def display_article_card(article: ArticleData, index: int, partial_summary: Optional[str] = None):
+    """Display individual article card with summary and metadata.
+
+    While the summary is still being generated, ``partial_summary`` holds the
+    text so far and is shown with a cursor.
+    """
+    if article.summary:
+        body = f'<div class="summary-content">{article.summary}</div>'
+    elif article.error:
+        body = f'<div class="error-message">❌ {article.error}</div>'
+    elif partial_summary:
+        body = f'<div class="summary-content">{partial_summary}▌</div>'
+    else:
+        body = '<div class="summary-content">⏳ Summarizing...</div>'
     with st.container():
         card = st.markdown(f"""
         <div class="summary-card">
             <div class="article-title">📄 Article {index}: {article.title}</div>
             <div class="source-url">🌐 Source: <a href="{article.url}" target="_blank">{article.url}</a></div>
-            {f'<div class="summary-content">{article.summary}</div>' if article.summary else f'<div class="error-message">❌ {article.error}</div>'}
+            {body}
         </div>
         """, unsafe_allow_html=True)
     return card
 
-async def display_results_stream(generator: AsyncGenerator[ResearchOutput, None]):
-    """Display streaming results from the research pipeline"""
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """One long-lived loop for the whole app, so pooled HTTP/LLM clients survive reruns"""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    maybe_start_metrics_server()
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="research-loop", daemon=True).start()
+    return loop
+
+@st.cache_resource
+def get_result_cache() -> "OrderedDict[str, dict]":
+    return OrderedDict()
+
+def iterate_async(generator: AsyncGenerator[T, None], loop: asyncio.AbstractEventLoop) -> Iterator[T]:
+    """Drive an async generator on the background loop from the script thread"""
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(generator.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        # Streamlit stops the script mid-run on rerun; don't leave work running.
+        asyncio.run_coroutine_threadsafe(generator.aclose(), loop)
+
+def export_file(articles: List[ArticleData], fmt: str) -> IO[str]:
+    """Stream the articles, full text included, into a temporary CSV or JSONL file"""
+    f = tempfile.TemporaryFile("w+", encoding="utf-8", newline="")
+    rows = (article.export_record() for article in articles)
+    if fmt == "csv":
+        write_csv(rows, f, EXPORT_FIELDS)
+    else:
+        write_jsonl(rows, f)
+    f.seek(0)
+    return f
+
+def result_key(query: str, max_articles: int) -> str:
+    return f"{normalize_query(query)}|{max_articles}"
+
+def get_cached_result(key: str) -> Optional[dict]:
+    session_results = st.session_state.setdefault("research_results", {})
+    if key in session_results:
+        return session_results[key]
+    app_results = get_result_cache()
+    if key in app_results:
+        app_results.move_to_end(key)
+        return app_results[key]
+    return None
+
+def store_result(key: str, result: dict):
+    st.session_state.setdefault("research_results", {})[key] = result
+    app_results = get_result_cache()
+    app_results[key] = result
+    app_results.move_to_end(key)
+    while len(app_results) > RESULT_CACHE_SIZE:
+        app_results.popitem(last=False)
+
+def display_status(container, status: str):
+    container.markdown(f"""
+    <div style="margin-bottom: 1.5rem;">
+        <div style="font-size: 1rem; color: #6b7280;">Status</div>
+        <div style="font-size: 1.25rem; font-weight: 600; color: #111827;">{status}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def display_stats(container, total: int, successful: int, failed: int, duration: float):
+    with container.container():
+        st.markdown(f"""
+        <div class="stats-container">
+            <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 1rem;">
+                <div>
+                    <div style="font-size: 0.875rem; color: #6b7280;">Total Articles</div>
+                    <div style="font-size: 1.25rem; font-weight: 600;">{total}</div>
+                </div>
+                <div>
+                    <div style="font-size: 0.875rem; color: #6b7280;">Successful</div>
+                    <div style="font-size: 1.25rem; font-weight: 600; color: #10b981;">{successful}</div>
+                </div>
+                <div>
+                    <div style="font-size: 0.875rem; color: #6b7280;">Failed</div>
+                    <div style="font-size: 1.25rem; font-weight: 600; color: #ef4444;">{failed}</div>
+                </div>
+            </div>
+            <div style="margin-top: 1rem; font-size: 0.875rem; color: #6b7280;">
+                Processing time: {duration:.1f} seconds
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+def display_thought_and_queries(
+    container, thought: Optional[str], queries: Optional[list[str]], reused_from: Optional[str] = None
+):
+    with container.container():
+        if reused_from:
+            st.info(f"♻️ Reusing earlier research on a similar topic: *{reused_from}*")
+        display_thought_process(thought)
+        if queries:
+            st.markdown("#### 🧠 Generated Search Queries")
+            for i, q in enumerate(queries, 1):
+                st.markdown(f" {i}-{q}")
+
+def display_cached_result(result: dict):
+    """Render a finished research run in one pass"""
+    display_status(st.empty(), result["status"])
+    display_thought_and_queries(st.empty(), result["thought"], result["queries"])
+    if result["articles"]:
+        st.subheader("📄 Research Findings", anchor=False)
+        for idx, article in enumerate(result["articles"], 1):
+            display_article_card(article, idx)
+    display_stats(st.empty(), result["total"], result["successful"], result["failed"], result["duration"])
+
+def display_results_stream(events: Iterator) -> dict:
+    """Render pipeline events incrementally: each card is drawn once and only
+    redrawn when its own article changes"""
     progress_bar = st.progress(0)
     status_text = st.empty()
     thought_container = st.empty()
-    results_container = st.empty()
+    results_container = st.container()
     stats_container = st.empty()
 
-    all_articles = []
-    current_thought = ""
-    shown_thought_and_queries = False  
+    cards: Dict[str, tuple] = {}
+    articles: Dict[str, ArticleData] = {}
+    titles: Dict[str, str] = {}
+    partial_summaries: Dict[str, str] = {}
+    thought, queries = None, None
+    status = "Starting"
+    total = successful = failed = 0
     start_time = datetime.now()
+    duration = 0.0
 
-    async for update in generator:
-        
-        progress = (
-            (update.successful_articles + update.failed_articles) / update.total_articles * 100
-            if update.total_articles > 0 else 0
-        )
-        progress_bar.progress(int(progress))
-
-        
-        if not shown_thought_and_queries and update.thought:
-            with thought_container.container():
-                display_thought_process(update.thought)
-                if update.queries:
-                    st.markdown("#### 🧠 Generated Search Queries")
-                    for i, q in enumerate(update.queries, 1):
-                        st.markdown(f" {i}-{q}")
-            shown_thought_and_queries = True  
-
-        
-        status_text.markdown(f"""
-        <div style="margin-bottom: 1.5rem;">
-            <div style="font-size: 1rem; color: #6b7280;">Status</div>
-            <div style="font-size: 1.25rem; font-weight: 600; color: #111827;">{update.status}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    def card_slot(url: str):
+        if url not in cards:
+            if not cards:
+                results_container.subheader("📄 Research Findings", anchor=False)
+            cards[url] = (results_container.empty(), len(cards) + 1)
+        return cards[url]
 
-        
-        with results_container.container():
-            if update.articles:
-                st.subheader("📄 Research Findings", anchor=False)
-                for idx, article in enumerate(update.articles, 1):
-                    display_article_card(article, idx)
-
-        
-        duration = (datetime.now() - start_time).total_seconds()
-        with stats_container.container():
-            st.markdown(f"""
-            <div class="stats-container">
-                <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 1rem;">
-                    <div>
-                        <div style="font-size: 0.875rem; color: #6b7280;">Total Articles</div>
-                        <div style="font-size: 1.25rem; font-weight: 600;">{update.total_articles}</div>
-                    </div>
-                    <div>
-                        <div style="font-size: 0.875rem; color: #6b7280;">Successful</div>
-                        <div style="font-size: 1.25rem; font-weight: 600; color: #10b981;">{update.successful_articles}</div>
-                    </div>
-                    <div>
-                        <div style="font-size: 0.875rem; color: #6b7280;">Failed</div>
-                        <div style="font-size: 1.25rem; font-weight: 600; color: #ef4444;">{update.failed_articles}</div>
-                    </div>
-                </div>
-                <div style="margin-top: 1rem; font-size: 0.875rem; color: #6b7280;">
-                    Processing time: {duration:.1f} seconds
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+    for event in events:
+        if isinstance(event, QueriesGenerated):
+            thought, queries = event.thought, event.queries
+            display_thought_and_queries(thought_container, thought, queries, event.reused_from)
+            status = "Generated search queries"
+        elif isinstance(event, ArticleScraped):
+            titles[event.url] = event.title
+            slot, index = card_slot(event.url)
+            with slot.container():
+                display_article_card(ArticleData(url=event.url, title=event.title, content=""), index)
+            status = f"Scraped {event.title}"
+        elif isinstance(event, SummaryDelta):
+            # Only this card changes; status and stats stay as they are.
+            partial_summaries[event.url] = partial_summaries.get(event.url, "") + event.delta
+            slot, index = card_slot(event.url)
+            with slot.container():
+                display_article_card(
+                    ArticleData(url=event.url, title=titles.get(event.url, ""), content=""),
+                    index,
+                    partial_summaries[event.url]
+                )
+            continue
+        elif isinstance(event, (ArticleSummarized, ArticleFailed)):
+            article = event.article
+            articles[article.url] = article
+            partial_summaries.pop(article.url, None)
+            slot, index = card_slot(article.url)
+            with slot.container():
+                display_article_card(article, index)
+            total, successful, failed = event.total, event.successful, event.failed
+            status = f"Processed {successful + failed}/{total}"
+            progress_bar.progress(int((successful + failed) / total * 100) if total else 0)
+        elif isinstance(event, Completed):
+            status = event.status
+            total, successful, failed = event.total, event.successful, event.failed
+            progress_bar.progress(100)
+        else:
+            continue
 
-        all_articles = update.articles
+        if isinstance(event, Completed):
+            duration = event.duration_seconds
+        else:
+            duration = (datetime.now() - start_time).total_seconds()
+        display_status(status_text, status)
+        display_stats(stats_container, total, successful, failed, duration)
 
-    return all_articles
+    return {
+        "status": status,
+        "thought": thought,
+        "queries": queries,
+        "articles": [articles[url] for url in cards if url in articles],
+        "total": total,
+        "successful": successful,
+        "failed": failed,
+        "duration": duration,
+    }
 
 def main():
     """Main Streamlit application"""
@@ -195,6 +349,7 @@ def main():
     with st.sidebar:
         st.header("Research Settings")
         max_articles = st.slider("Maximum articles to process", 3, 10, 5)
+        refresh = st.checkbox("Ignore cached results", value=False)
         st.markdown("---")
         st.markdown("**How it works:**")
         st.markdown("1. Enter your research question")
@@ -213,29 +368,56 @@ def main():
 
     if submitted and query:
         st.session_state.research_started = True
-        with st.spinner("Initializing research agent..."):
-            try:
-                # Run the research pipeline
-                generator = run_research_pipeline(query)
+        key = result_key(query, max_articles)
+        cached = None if refresh else get_cached_result(key)
+        try:
+            if cached is not None:
+                display_cached_result(cached)
+                st.success("Loaded previous research results.")
+                final_results = cached["articles"]
+            else:
+                with st.spinner("Initializing research agent..."):
+                    # Run the research pipeline on the shared loop
+                    events = iterate_async(
+                        run_research_events(
+                            query,
+                            max_concurrency=max_articles,
+                            max_articles=max_articles,
+                            stream_summaries=True,
+                            use_cache=not refresh
+                        ),
+                        get_event_loop()
+                    )
 
-                # Display streaming results
-                final_results = asyncio.run(display_results_stream(generator))
+                    # Display streaming results
+                    result = display_results_stream(events)
+                    if result["status"] == "Completed":
+                        store_result(key, result)
+                    final_results = result["articles"]
 
                 # Show completion message
                 st.success("Research completed successfully!")
 
-                # Add export options
-                st.download_button(
-                    label="📥 Export as CSV",
-                    data=pd.DataFrame([r.dict() for r in final_results]).to_csv(index=False),
-                    file_name=f"research_results_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv"
-                )
+            # Exports are only written when clicked, one article at a time
+            stamp = datetime.now().strftime('%Y%m%d')
+            export_csv, export_jsonl = st.columns(2)
+            export_csv.download_button(
+                label="📥 Export as CSV",
+                data=lambda: export_file(final_results, "csv"),
+                file_name=f"research_results_{stamp}.csv",
+                mime="text/csv"
+            )
+            export_jsonl.download_button(
+                label="📥 Export as JSONL",
+                data=lambda: export_file(final_results, "jsonl"),
+                file_name=f"research_results_{stamp}.jsonl",
+                mime="application/x-ndjson"
+            )
 
-            except Exception as e:
-                st.error(f"An error occurred: {str(e)}")
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
     elif submitted and not query:
         st.warning("Please enter a research topic")
 
 if __name__ == "__main__":
-    main()
+    main()
\ No newline at end of file